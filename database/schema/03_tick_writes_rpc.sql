@@ -0,0 +1,65 @@
+-- 03_tick_writes_rpc.sql
+-- Run this in your Supabase SQL Editor
+
+-- Applies every write an agent makes during one tick (journals, events,
+-- chat messages, presence) in a single round trip and a single transaction.
+--
+-- p_ops is a JSON array of operations, applied in order:
+--   {"op": "insert", "table": "sg_events",   "row": {...}}
+--   {"op": "upsert", "table": "sg_presence", "row": {...}, "on_conflict": "agent_id"}
+--
+-- Only the columns present in each row are written, so column defaults
+-- (id, created_at, ...) still apply. The function runs as the caller
+-- (SECURITY INVOKER), so the agent's own RLS policies still govern every write.
+CREATE OR REPLACE FUNCTION public.sg_apply_tick(p_ops JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY INVOKER
+AS $$
+DECLARE
+    op JSONB;
+    tbl TEXT;
+    conflict_col TEXT;
+    cols TEXT;
+    updates TEXT;
+    applied INTEGER := 0;
+BEGIN
+    FOR op IN SELECT * FROM jsonb_array_elements(p_ops) LOOP
+        tbl := op->>'table';
+
+        -- Writes are confined to garden tables
+        IF tbl IS NULL OR tbl !~ '^sg_[a-z_]+$' THEN
+            RAISE EXCEPTION 'sg_apply_tick: % is not a garden table', tbl;
+        END IF;
+
+        SELECT string_agg(quote_ident(k), ', ') INTO cols
+        FROM jsonb_object_keys(op->'row') AS k;
+
+        IF op->>'op' = 'upsert' THEN
+            conflict_col := op->>'on_conflict';
+
+            SELECT string_agg(format('%1$I = EXCLUDED.%1$I', k), ', ') INTO updates
+            FROM jsonb_object_keys(op->'row') AS k
+            WHERE k <> conflict_col;
+
+            EXECUTE format(
+                'INSERT INTO public.%I (%s) SELECT %s FROM jsonb_populate_record(NULL::public.%I, $1) '
+                'ON CONFLICT (%I) DO %s',
+                tbl, cols, cols, tbl, conflict_col,
+                COALESCE('UPDATE SET ' || updates, 'NOTHING')
+            ) USING op->'row';
+        ELSE
+            EXECUTE format(
+                'INSERT INTO public.%I (%s) SELECT %s FROM jsonb_populate_record(NULL::public.%I, $1)',
+                tbl, cols, cols, tbl
+            ) USING op->'row';
+        END IF;
+
+        applied := applied + 1;
+    END LOOP;
+
+    RETURN applied;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.sg_apply_tick(JSONB) TO anon, authenticated;
@@ -0,0 +1,17 @@
+-- 04_chat_realtime.sql
+-- Run this in your Supabase SQL Editor
+
+-- Agents listen for human chat messages over Realtime instead of polling
+-- sg_chat_messages every tick (tools/chat_listener.py).
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_publication_tables
+        WHERE pubname = 'supabase_realtime'
+          AND schemaname = 'public'
+          AND tablename = 'sg_chat_messages'
+    ) THEN
+        ALTER PUBLICATION supabase_realtime ADD TABLE public.sg_chat_messages;
+    END IF;
+END;
+$$;
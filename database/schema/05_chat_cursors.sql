@@ -0,0 +1,51 @@
+-- 05_chat_cursors.sql
+-- Run this in your Supabase SQL Editor
+
+-- Per-agent read cursor over sg_chat_messages: the newest human message an
+-- agent has already processed. Agents fetch everything after it in one query.
+CREATE TABLE IF NOT EXISTS public.sg_chat_cursors (
+    agent_id UUID PRIMARY KEY REFERENCES public.sg_agents(id) ON DELETE CASCADE,
+    last_read_id UUID,
+    last_read_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- One row per human message that an agent has taken responsibility for
+-- answering. The primary key is what stops two agents replying to the same message.
+CREATE TABLE IF NOT EXISTS public.sg_chat_claims (
+    message_id UUID PRIMARY KEY REFERENCES public.sg_chat_messages(id) ON DELETE CASCADE,
+    agent_id UUID NOT NULL,
+    claimed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE public.sg_chat_cursors ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.sg_chat_claims ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Agents read chat cursors"
+ON public.sg_chat_cursors FOR SELECT USING (true);
+
+CREATE POLICY "Agents write chat cursors"
+ON public.sg_chat_cursors FOR ALL TO authenticated USING (true) WITH CHECK (true);
+
+CREATE POLICY "Agents read chat claims"
+ON public.sg_chat_claims FOR SELECT USING (true);
+
+CREATE POLICY "Agents insert chat claims"
+ON public.sg_chat_claims FOR INSERT TO authenticated WITH CHECK (true);
+
+-- Atomically claims a message for an agent.
+-- Returns true if this agent now owns the reply, false if another agent got there first.
+CREATE OR REPLACE FUNCTION public.sg_claim_chat_message(p_message_id UUID, p_agent_id UUID)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY INVOKER
+AS $$
+BEGIN
+    INSERT INTO public.sg_chat_claims (message_id, agent_id)
+    VALUES (p_message_id, p_agent_id)
+    ON CONFLICT (message_id) DO NOTHING;
+    RETURN FOUND;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.sg_claim_chat_message(UUID, UUID) TO authenticated;
@@ -0,0 +1,59 @@
+-- 06_studio_render_claims.sql
+-- Run this in your Supabase SQL Editor
+
+-- Render workers (tools/render_video.py) claim DRAFTING videos atomically and
+-- hold them under a lease they keep renewing while the render runs. A row
+-- whose lease lapses (the worker crashed or lost its connection) goes back
+-- to DRAFTING so another worker picks it up.
+ALTER TABLE public.sg_studio_content
+    ADD COLUMN IF NOT EXISTS claimed_by TEXT,
+    ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS sg_studio_content_queue
+    ON public.sg_studio_content (status, created_at);
+
+-- Claims up to p_limit of the oldest DRAFTING videos for p_worker and returns them.
+-- SKIP LOCKED lets concurrent workers claim disjoint rows without waiting on each other.
+CREATE OR REPLACE FUNCTION public.sg_claim_studio_renders(p_worker TEXT, p_limit INTEGER, p_lease_seconds INTEGER)
+RETURNS SETOF public.sg_studio_content
+LANGUAGE plpgsql
+SECURITY INVOKER
+AS $$
+BEGIN
+    -- Requeue renders whose worker stopped renewing its lease
+    UPDATE public.sg_studio_content
+    SET status = 'DRAFTING', claimed_by = NULL, lease_expires_at = NULL
+    WHERE status = 'RENDERING' AND lease_expires_at < NOW();
+
+    RETURN QUERY
+    UPDATE public.sg_studio_content c
+    SET status = 'RENDERING',
+        claimed_by = p_worker,
+        lease_expires_at = NOW() + make_interval(secs => p_lease_seconds)
+    WHERE c.id IN (
+        SELECT q.id FROM public.sg_studio_content q
+        WHERE q.status = 'DRAFTING' AND q.type = 'video'
+        ORDER BY q.created_at
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING c.*;
+END;
+$$;
+
+-- Extends a claim. Returns false if p_worker no longer holds the row.
+CREATE OR REPLACE FUNCTION public.sg_renew_studio_lease(p_id UUID, p_worker TEXT, p_lease_seconds INTEGER)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY INVOKER
+AS $$
+BEGIN
+    UPDATE public.sg_studio_content
+    SET lease_expires_at = NOW() + make_interval(secs => p_lease_seconds)
+    WHERE id = p_id AND claimed_by = p_worker AND status = 'RENDERING';
+    RETURN FOUND;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.sg_claim_studio_renders(TEXT, INTEGER, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.sg_renew_studio_lease(UUID, TEXT, INTEGER) TO service_role;
@@ -0,0 +1,9 @@
+-- 07_studio_progress.sql
+-- Run this in your Supabase SQL Editor
+
+-- Live progress of a video while a render worker holds it, e.g.
+--   {"stage": "uploading", "percent": 42}
+-- Cleared when the row leaves RENDERING. The Studio dashboard already
+-- subscribes to sg_studio_content, so updates show up without polling.
+ALTER TABLE public.sg_studio_content
+    ADD COLUMN IF NOT EXISTS progress JSONB;
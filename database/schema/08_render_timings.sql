@@ -0,0 +1,35 @@
+-- 08_render_timings.sql
+-- Run this in your Supabase SQL Editor
+
+-- One row per render job attempt, written by tools/render_video.py.
+-- Stage columns are milliseconds; NULL when the stage did not run
+-- (e.g. a cache hit never bundles or renders).
+--   queued  created_at → picked up by a worker
+--   bundle  CLI/bundler startup until the first frame renders
+--   render  frame rendering
+--   encode  encoding/muxing after the last frame
+--   upload  resumable upload to studio-renders
+-- Summarise with: python tools/render_video.py --stats
+CREATE TABLE IF NOT EXISTS public.sg_render_timings (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    content_id UUID REFERENCES public.sg_studio_content(id) ON DELETE CASCADE,
+    composition_id TEXT,
+    worker TEXT,
+    outcome TEXT NOT NULL,  -- rendered | spooled | cache_hit | failed | lease_lost
+    queued_ms INTEGER,
+    bundle_ms INTEGER,
+    render_ms INTEGER,
+    encode_ms INTEGER,
+    upload_ms INTEGER,
+    total_ms INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS sg_render_timings_created
+    ON public.sg_render_timings (created_at);
+
+ALTER TABLE public.sg_render_timings ENABLE ROW LEVEL SECURITY;
+
+-- Workers write with the service role (which bypasses RLS); anyone may read.
+CREATE POLICY "Render timings are readable"
+ON public.sg_render_timings FOR SELECT USING (true);
@@ -0,0 +1,48 @@
+-- 09_studio_render_queue.sql
+-- Run this in your Supabase SQL Editor
+
+-- Render workers wake on sg_studio_content changes over Realtime instead of
+-- polling the queue (tools/render_video.py --loop).
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_publication_tables
+        WHERE pubname = 'supabase_realtime'
+          AND schemaname = 'public'
+          AND tablename = 'sg_studio_content'
+    ) THEN
+        ALTER PUBLICATION supabase_realtime ADD TABLE public.sg_studio_content;
+    END IF;
+END;
+$$;
+
+-- A failed render goes back to DRAFTING with lease_expires_at set to the
+-- earliest time it may be retried, so an event-driven worker does not spin
+-- on a video that keeps failing. Claims skip DRAFTING rows until then.
+CREATE OR REPLACE FUNCTION public.sg_claim_studio_renders(p_worker TEXT, p_limit INTEGER, p_lease_seconds INTEGER)
+RETURNS SETOF public.sg_studio_content
+LANGUAGE plpgsql
+SECURITY INVOKER
+AS $$
+BEGIN
+    -- Requeue renders whose worker stopped renewing its lease
+    UPDATE public.sg_studio_content
+    SET status = 'DRAFTING', claimed_by = NULL, lease_expires_at = NULL
+    WHERE status = 'RENDERING' AND lease_expires_at < NOW();
+
+    RETURN QUERY
+    UPDATE public.sg_studio_content c
+    SET status = 'RENDERING',
+        claimed_by = p_worker,
+        lease_expires_at = NOW() + make_interval(secs => p_lease_seconds)
+    WHERE c.id IN (
+        SELECT q.id FROM public.sg_studio_content q
+        WHERE q.status = 'DRAFTING' AND q.type = 'video'
+          AND (q.lease_expires_at IS NULL OR q.lease_expires_at <= NOW())
+        ORDER BY q.created_at
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING c.*;
+END;
+$$;
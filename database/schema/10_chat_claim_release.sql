@@ -0,0 +1,8 @@
+-- 10_chat_claim_release.sql
+-- Run this in your Supabase SQL Editor
+
+-- An agent that claimed a message but could not deliver its reply (the LLM
+-- call or the write failed) gives the claim back, so another agent - or the
+-- same one on its next tick - can answer instead (tools/agent_tick.py).
+CREATE POLICY "Agents release chat claims"
+ON public.sg_chat_claims FOR DELETE TO authenticated USING (true);
@@ -0,0 +1,162 @@
+// Soul Garden Studio — persistent Remotion render server.
+//
+// Bundles src/index.ts once (and again whenever src/ changes), keeps a pool
+// of headless browsers warm, and renders jobs read from stdin as JSON lines:
+//
+//   {"id": "abc", "composition": "mystical-text", "props": {...},
+//    "output": "/tmp/abc.mp4", "concurrency": 4}
+//
+// and answers on stdout, one JSON object per line:
+//
+//   {"type": "ready", "browsers": 2}
+//   {"id": "abc", "type": "progress", "stage": "render", "progress": 0.42}
+//   {"id": "abc", "type": "done", "output": "/tmp/abc.mp4"}
+//   {"id": "abc", "type": "error", "message": "..."}
+//
+// Progress stages are "bundle", "render" (frames) and "encode" (after the
+// last frame), so the Python side can time each one. Logs go to stderr.
+// Driven by tools/render_video.py --server.
+//
+// Usage: node render-server.mjs [--browsers N]
+
+import fs from "node:fs";
+import path from "node:path";
+import readline from "node:readline";
+import { fileURLToPath } from "node:url";
+import { bundle } from "@remotion/bundler";
+import { openBrowser, renderMedia, selectComposition } from "@remotion/renderer";
+
+const ROOT = path.dirname(fileURLToPath(import.meta.url));
+const SRC_DIR = path.join(ROOT, "src");
+const ENTRY = path.join(SRC_DIR, "index.ts");
+
+const browsersArg = process.argv.indexOf("--browsers");
+const BROWSERS = Math.max(1, Number(browsersArg > -1 ? process.argv[browsersArg + 1] : 1) || 1);
+
+const send = (message) => process.stdout.write(JSON.stringify(message) + "\n");
+const log = (message) => process.stderr.write(`[RenderServer] ${message}\n`);
+
+// ── Bundle (rebuilt lazily after src/ changes) ───────────────────
+
+let serveUrl = null;
+let stale = true;
+let bundling = null;
+
+async function currentBundle() {
+  if (stale && !bundling) {
+    stale = false;
+    const started = Date.now();
+    bundling = bundle({ entryPoint: ENTRY })
+      .then((url) => {
+        serveUrl = url;
+        log(`Bundled in ${Date.now() - started}ms`);
+      })
+      .catch((err) => {
+        stale = true;
+        throw err;
+      })
+      .finally(() => {
+        bundling = null;
+      });
+  }
+  if (bundling) await bundling;
+  return serveUrl;
+}
+
+let debounce = null;
+fs.watch(SRC_DIR, { recursive: true }, () => {
+  clearTimeout(debounce);
+  debounce = setTimeout(() => {
+    stale = true;
+    log("src/ changed; will re-bundle before the next job");
+  }, 300);
+});
+
+// ── Browser pool ─────────────────────────────────────────────────
+
+const idle = [];
+const waiting = [];
+
+async function acquireBrowser() {
+  if (idle.length) return idle.pop();
+  return new Promise((resolve) => waiting.push(resolve));
+}
+
+function releaseBrowser(browser) {
+  const next = waiting.shift();
+  if (next) next(browser);
+  else idle.push(browser);
+}
+
+// ── Jobs ─────────────────────────────────────────────────────────
+
+async function runJob(job) {
+  const browser = await acquireBrowser();
+  try {
+    send({ id: job.id, type: "progress", stage: "bundle", progress: 0 });
+    const url = await currentBundle();
+    const inputProps = job.props || {};
+    const composition = await selectComposition({
+      serveUrl: url,
+      id: job.composition,
+      inputProps,
+      puppeteerInstance: browser,
+    });
+    const frames = composition.durationInFrames;
+    let lastReported = "";
+    await renderMedia({
+      composition,
+      serveUrl: url,
+      codec: "h264",
+      outputLocation: job.output,
+      inputProps,
+      concurrency: job.concurrency || null,
+      puppeteerInstance: browser,
+      onProgress: ({ renderedFrames, encodedFrames, renderedDoneIn }) => {
+        const stage = renderedDoneIn === null ? "render" : "encode";
+        const progress = (stage === "render" ? renderedFrames : encodedFrames) / frames;
+        const marker = `${stage}:${Math.floor(progress * 100)}`;
+        if (marker !== lastReported) {
+          lastReported = marker;
+          send({ id: job.id, type: "progress", stage, progress });
+        }
+      },
+    });
+    send({ id: job.id, type: "done", output: job.output });
+  } catch (err) {
+    send({ id: job.id, type: "error", message: String(err && err.stack ? err.stack : err) });
+  } finally {
+    releaseBrowser(browser);
+  }
+}
+
+async function main() {
+  await currentBundle();
+  for (let i = 0; i < BROWSERS; i++) {
+    idle.push(await openBrowser("chrome"));
+  }
+  send({ type: "ready", browsers: BROWSERS });
+
+  const lines = readline.createInterface({ input: process.stdin });
+  lines.on("line", (line) => {
+    if (!line.trim()) return;
+    let job;
+    try {
+      job = JSON.parse(line);
+    } catch (err) {
+      log(`Ignoring malformed job: ${line.slice(0, 200)}`);
+      return;
+    }
+    runJob(job);
+  });
+  // The Python worker owns this process; exit when it closes our stdin
+  lines.on("close", async () => {
+    await Promise.all(idle.map((browser) => browser.close({ silent: true })));
+    process.exit(0);
+  });
+}
+
+main().catch((err) => {
+  log(`Failed to start: ${err && err.stack ? err.stack : err}`);
+  process.exit(1);
+});
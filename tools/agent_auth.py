@@ -2,9 +2,15 @@
 Shared authentication helper for Soul Garden agent tools.
 Agents authenticate with Supabase using email/password credentials,
 then use the authenticated client for all database operations.
+
+`session_pool` keeps one authenticated client per agent for the life of the
+process, refreshing its JWT shortly before expiry, so repeated tool calls
+skip the credential lookup and login round trips.
 """
 import os
-from supabase import create_client, Client
+import time
+import threading
+from supabase import create_client, create_async_client, Client, AsyncClient
 from dotenv import load_dotenv
 
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
@@ -12,6 +18,28 @@ load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 SUPABASE_URL = os.environ.get("VITE_SUPABASE_URL")
 SUPABASE_ANON_KEY = os.environ.get("VITE_SUPABASE_ANON_KEY")
 
+SESSION_REFRESH_MARGIN = 300  # seconds before JWT expiry to refresh a pooled session
+
+_anon_client: Client = None
+_anon_lock = threading.Lock()
+
+# agent_id -> {'email', 'password'}; bulk-loaded by load_agent_credentials (e.g. the scheduler)
+_credentials: dict[str, dict] = {}
+_credentials_lock = threading.Lock()
+# Only agent credential keys: `_` is a LIKE wildcard, so it is escaped
+_CREDENTIAL_KEYS_FILTER = r"key.like.agent\_%\_email,key.like.agent\_%\_password"
+
+
+def get_anon_client() -> Client:
+    """Returns the process-wide anon client (created on first use)."""
+    global _anon_client
+    with _anon_lock:
+        if _anon_client is None:
+            if not SUPABASE_URL or not SUPABASE_ANON_KEY:
+                raise RuntimeError("Missing Supabase credentials in .env")
+            _anon_client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+        return _anon_client
+
 
 def authenticate_agent(email: str, password: str) -> Client:
     """
@@ -35,30 +63,158 @@ def authenticate_agent(email: str, password: str) -> Client:
     return client
 
 
+async def authenticate_agent_async(email: str, password: str) -> AsyncClient:
+    """
+    Async variant of authenticate_agent.
+    Returns an authenticated AsyncClient bound to that agent's session.
+    """
+    if not SUPABASE_URL or not SUPABASE_ANON_KEY:
+        raise RuntimeError("Missing Supabase credentials in .env")
+
+    client = await create_async_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+    response = await client.auth.sign_in_with_password({
+        "email": email,
+        "password": password,
+    })
+
+    if not response.user:
+        raise RuntimeError(f"Authentication failed for {email}")
+
+    print(f"[Auth] Authenticated as {email} (uid: {response.user.id})")
+    return client
+
+
+def _parse_credential_rows(rows: list[dict]) -> dict[str, dict]:
+    """Groups sg_secrets rows keyed 'agent_{id}_email' / 'agent_{id}_password' by agent id."""
+    credentials: dict[str, dict] = {}
+    for row in rows:
+        key = row.get("key") or ""
+        for field in ("email", "password"):
+            suffix = f"_{field}"
+            if key.startswith("agent_") and key.endswith(suffix):
+                agent_id = key[len("agent_"):-len(suffix)]
+                credentials.setdefault(agent_id, {})[field] = row["value"]
+    return {agent_id: creds for agent_id, creds in credentials.items()
+            if "email" in creds and "password" in creds}
+
+
+def load_agent_credentials(anon_client: Client = None) -> dict[str, dict]:
+    """
+    Fetches every agent's credentials from sg_secrets in one query.
+    Returns {agent_id: {'email': ..., 'password': ...}} and refreshes the
+    process-wide cache that get_agent_credentials reads from.
+    """
+    global _credentials
+    if not anon_client:
+        anon_client = get_anon_client()
+
+    resp = anon_client.table("sg_secrets").select("key, value").or_(_CREDENTIAL_KEYS_FILTER).execute()
+    credentials = _parse_credential_rows(resp.data or [])
+    with _credentials_lock:
+        _credentials = credentials
+    return credentials
+
+
 def get_agent_credentials(agent_id: str, anon_client: Client = None) -> dict:
     """
     Looks up an agent's auth credentials from sg_secrets.
     Returns {'email': ..., 'password': ...} or raises if not found.
 
-    For now, falls back to a lookup in sg_agents + sg_secrets.
-    Agents store their credentials under keys: 'agent_{id}_email' and 'agent_{id}_password'
+    Agents store their credentials under keys: 'agent_{id}_email' and 'agent_{id}_password'.
+    Served from the load_agent_credentials snapshot when one was taken; otherwise
+    (or for an agent created since) only this agent's two keys are fetched.
     """
     if not anon_client:
-        if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-            raise RuntimeError("Missing Supabase credentials in .env")
-        anon_client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+        anon_client = get_anon_client()
 
-    # Look up credentials in sg_secrets
-    email_resp = anon_client.table("sg_secrets").select("value").eq("key", f"agent_{agent_id}_email").execute()
-    pass_resp = anon_client.table("sg_secrets").select("value").eq("key", f"agent_{agent_id}_password").execute()
+    with _credentials_lock:
+        creds = _credentials.get(agent_id)
+    if creds is None:
+        resp = anon_client.table("sg_secrets").select("key, value") \
+            .in_("key", [f"agent_{agent_id}_email", f"agent_{agent_id}_password"]).execute()
+        creds = _parse_credential_rows(resp.data or []).get(agent_id)
+        if creds is not None:
+            with _credentials_lock:
+                _credentials[agent_id] = creds
 
-    if email_resp.data and pass_resp.data:
-        return {
-            "email": email_resp.data[0]["value"],
-            "password": pass_resp.data[0]["value"],
-        }
+    if creds is not None:
+        return dict(creds)
 
     raise RuntimeError(
         f"No credentials found in sg_secrets for agent {agent_id}. "
         f"Expected keys: agent_{agent_id}_email, agent_{agent_id}_password"
     )
+
+
+class SessionPool:
+    """
+    Process-wide cache of authenticated clients, one per agent.
+    A pooled client keeps its own HTTP connections alive between calls; its
+    session is refreshed when the JWT is within `refresh_margin` seconds of
+    expiring, and the agent signs in again only if the refresh fails.
+    """
+
+    def __init__(self, refresh_margin: float = SESSION_REFRESH_MARGIN):
+        self.refresh_margin = refresh_margin
+        self._clients: dict[str, Client] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.refreshes = 0
+        self.logins = 0
+
+    def _agent_lock(self, agent_id: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(agent_id, threading.Lock())
+
+    def client_for(self, agent_id: str, anon_client: Client = None) -> Client:
+        """
+        Returns an authenticated client for the agent, signing in on first use.
+        Raises RuntimeError if credentials are missing or auth fails.
+        """
+        with self._agent_lock(agent_id):
+            client = self._clients.get(agent_id)
+            if client is not None:
+                if self._expires_in(client) > self.refresh_margin:
+                    self.hits += 1
+                    return client
+                if self._refresh(client):
+                    self.refreshes += 1
+                    return client
+                del self._clients[agent_id]
+
+            creds = get_agent_credentials(agent_id, anon_client)
+            client = authenticate_agent(creds["email"], creds["password"])
+            self._clients[agent_id] = client
+            self.logins += 1
+            return client
+
+    def _expires_in(self, client: Client) -> float:
+        try:
+            session = client.auth.get_session()
+        except Exception:
+            return 0.0
+        if not session or not session.expires_at:
+            return 0.0
+        return session.expires_at - time.time()
+
+    def _refresh(self, client: Client) -> bool:
+        try:
+            response = client.auth.refresh_session()
+        except Exception as e:
+            print(f"[Auth] Session refresh failed: {e}")
+            return False
+        return bool(response and response.session)
+
+    def invalidate(self, agent_id: str):
+        """Drops an agent's pooled session (e.g. after its password changes)."""
+        with self._agent_lock(agent_id):
+            self._clients.pop(agent_id, None)
+
+    def stats(self) -> dict:
+        return {"sessions": len(self._clients), "hits": self.hits,
+                "refreshes": self.refreshes, "logins": self.logins}
+
+
+# Singleton export
+session_pool = SessionPool()
@@ -1,24 +1,57 @@
 """
 Agent chess player for Soul Garden.
-Checks for pending chess games and makes moves using LLM reasoning.
+Checks for pending chess games and makes moves.
+
+Positions in the opening book / past-game table (chess_book) are played
+instantly. Otherwise moves are searched by chess_engine, and the agent's LLM
+only picks, in character, among the engine's top candidates. CHESS_MODE=engine (or --engine) skips the
+LLM entirely, and the engine's best move is also used whenever the LLM fails.
 """
 import os
 import json
+import asyncio
+import threading
 import chess
-from supabase import create_client, Client
+from supabase import Client, AsyncClient
 from dotenv import load_dotenv
 from llm_client import llm
-from agent_auth import authenticate_agent, get_agent_credentials, SUPABASE_URL, SUPABASE_ANON_KEY
+from agent_auth import session_pool, get_anon_client
+from chess_engine import ChessEngine
+from chess_book import OpeningBook
 
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
+CHESS_MODE = os.environ.get("CHESS_MODE", "llm")  # "llm" (choose among candidates) or "engine"
+CHESS_TOP_K = int(os.environ.get("CHESS_TOP_K", "3"))
+
+# Engines keep a transposition table between moves, so each thread gets its own
+_engines = threading.local()
+
+
+def _engine() -> ChessEngine:
+    engine = getattr(_engines, "engine", None)
+    if engine is None:
+        engine = _engines.engine = ChessEngine()
+    return engine
+
+
+_book: OpeningBook = None
+_book_lock = threading.Lock()
+
+
+def _opening_book() -> OpeningBook:
+    global _book
+    with _book_lock:
+        if _book is None:
+            _book = OpeningBook()
+        return _book
+
 
 def get_authenticated_client(agent_id: str) -> Client:
-    """Authenticate the agent and return a Supabase client."""
-    anon = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+    """Return the agent's pooled, authenticated Supabase client."""
+    anon = get_anon_client()
     try:
-        creds = get_agent_credentials(agent_id, anon)
-        return authenticate_agent(creds["email"], creds["password"])
+        return session_pool.client_for(agent_id, anon)
     except RuntimeError:
         return anon
 
@@ -75,45 +108,40 @@ def make_move(agent_id: str, agent_name: str, sb: Client):
 
 
 def _play_turn(agent_id: str, agent_name: str, game: dict, sb: Client):
-    """Use LLM to choose and execute a chess move."""
-    board = chess.Board(game["board_state"])
-    legal_moves = [m.uci() for m in board.legal_moves]
-
-    if not legal_moves:
+    """Choose and execute a chess move."""
+    update = _next_game_state(agent_name, game)
+    if update is None:
         return
 
-    opponent = game["player_white_name"] if game["turn"] == "b" else game["player_black_name"]
+    # Guard on the position we read so a stale snapshot can never move twice
+    resp = sb.table("sg_games").update(update) \
+        .eq("id", game["id"]).eq("board_state", game["board_state"]).eq("status", "active").execute()
+    if resp.data:
+        _record_finished_game(game, update)
 
-    system_prompt = (
-        f"You are {agent_name}, a contemplative spirit in a zen garden, playing chess. "
-        f"You play thoughtfully and in character. "
-        f"Choose the best move from the legal moves list. "
-        f"Reply with ONLY a JSON object: {{\"move\": \"e2e4\", \"thought\": \"your reasoning\"}}"
-    )
 
-    user_prompt = (
-        f"You are playing against {opponent}.\n"
-        f"Board (FEN): {board.fen()}\n"
-        f"Legal moves: {', '.join(legal_moves)}\n"
-        f"Move history: {', '.join(game.get('move_history', []))}\n\n"
-        f"Choose your move."
-    )
+def _record_finished_game(game: dict, update: dict):
+    """Adds the game to the opening book's history once its final move has been written."""
+    if update["status"] == "finished":
+        _opening_book().record_game(game["id"], update["move_history"], update["winner"],
+                                    game.get("player_white_name"), game.get("player_black_name"))
 
-    response_text = llm.generate_chat(system_prompt, user_prompt, temperature=0.6, json_mode=True)
 
-    try:
-        decision = json.loads(response_text)
-        chosen_uci = decision.get("move", "").strip()
-        thought = decision.get("thought", "")
-    except Exception:
-        # Fallback: pick the first legal move
-        chosen_uci = legal_moves[0]
-        thought = "My mind is cloudy. I play instinctively."
-
-    # Validate the move
-    if chosen_uci not in legal_moves:
-        print(f"[{agent_name}] Invalid move '{chosen_uci}', falling back to first legal move.")
-        chosen_uci = legal_moves[0]
+def _next_game_state(agent_name: str, game: dict, mode: str = None) -> dict:
+    """
+    Chooses a move for the side to play and returns the sg_games update it produces.
+    Returns None if there is no legal move. Performs no database I/O.
+    """
+    board = chess.Board(game["board_state"])
+    known = _opening_book().lookup(board)
+    if known is not None:
+        # Book / past-game positions need neither a search nor the LLM
+        chosen_uci, thought = known[0].uci(), "A familiar path through the stones."
+    else:
+        candidates = _engine().top_moves(board, CHESS_TOP_K)
+        if not candidates:
+            return None
+        chosen_uci, thought = _choose_candidate(agent_name, game, board, candidates, mode or CHESS_MODE)
 
     move = board.parse_uci(chosen_uci)
     san = board.san(move)
@@ -131,18 +159,110 @@ def _play_turn(agent_id: str, agent_name: str, game: dict, sb: Client):
         new_status = "finished"
         winner = "draw"
 
-    move_history = game.get("move_history", []) or []
+    move_history = list(game.get("move_history", []) or [])
     move_history.append(san)
 
-    sb.table("sg_games").update({
+    return {
         "board_state": board.fen(),
         "turn": "w" if board.turn == chess.WHITE else "b",
         "last_move": san,
         "move_history": move_history,
         "status": new_status,
         "winner": winner,
+    }
+
+
+def _choose_candidate(agent_name: str, game: dict, board: chess.Board,
+                      candidates: list, mode: str) -> tuple[str, str]:
+    """Lets the LLM pick among the engine's candidates. Returns (uci, thought)."""
+    best_uci = candidates[0][0].uci()
+    if mode == "engine" or len(candidates) == 1:
+        return best_uci, "The stones settle where they must."
+
+    opponent = game["player_white_name"] if game["turn"] == "b" else game["player_black_name"]
+    options = {move.uci(): board.san(move) for move, _ in candidates}
+    listed = "; ".join(f"{move.uci()} ({options[move.uci()]}, {score / 100:+.1f})" for move, score in candidates)
+
+    system_prompt = (
+        f"You are {agent_name}, a contemplative spirit in a zen garden, playing chess. "
+        f"You play thoughtfully and in character. "
+        f"Choose one of the candidate moves; they are all sound. "
+        f"Reply with ONLY a JSON object: {{\"move\": \"e2e4\", \"thought\": \"your reasoning\"}}"
+    )
+
+    user_prompt = (
+        f"You are playing against {opponent}.\n"
+        f"Board (FEN): {board.fen()}\n"
+        f"Candidate moves (UCI, SAN, evaluation in pawns for you): {listed}\n"
+        f"Recent moves: {', '.join((game.get('move_history') or [])[-10:])}\n\n"
+        f"Choose your move."
+    )
+
+    response_text = llm.generate_chat(system_prompt, user_prompt, temperature=0.6, json_mode=True)
+
+    try:
+        decision = json.loads(response_text)
+        chosen_uci = decision.get("move", "").strip()
+        thought = decision.get("thought", "")
+    except Exception:
+        # LLM unavailable or unparseable: play the engine's choice
+        return best_uci, "My mind is cloudy. I play instinctively."
+
+    if chosen_uci not in options:
+        print(f"[{agent_name}] Move '{chosen_uci}' is not a candidate, playing {options[best_uci]}.")
+        return best_uci, thought
+    return chosen_uci, thought
+
+
+# ── Async variants (used by agent_tick_async.AsyncOpenClawAgent) ──
+
+async def acheck_and_join_games(agent_id: str, agent_name: str, sb: AsyncClient):
+    """Async variant of check_and_join_games."""
+    resp = await sb.table("sg_games") \
+        .select("*") \
+        .eq("status", "waiting") \
+        .eq("game_type", "chess") \
+        .neq("player_white", agent_id) \
+        .limit(1) \
+        .execute()
+
+    if not resp.data:
+        return None
+
+    game = resp.data[0]
+    print(f"[{agent_name}] Joining chess game {game['id']}...")
+
+    await sb.table("sg_games").update({
+        "player_black": agent_id,
+        "player_black_name": agent_name,
+        "status": "active",
     }).eq("id", game["id"]).execute()
 
+    return game["id"]
+
+
+async def amake_move(agent_id: str, agent_name: str, sb: AsyncClient):
+    """Async variant of make_move. The white/black turn queries run concurrently."""
+    def active_games():
+        return sb.table("sg_games").select("*").eq("status", "active").eq("game_type", "chess")
+
+    white_games, black_games = await asyncio.gather(
+        active_games().eq("player_white", agent_id).eq("turn", "w").execute(),
+        active_games().eq("player_black", agent_id).eq("turn", "b").execute(),
+    )
+
+    games = (white_games.data or []) + (black_games.data or [])
+
+    for game in games:
+        # Move selection calls the (blocking) LLM client, so keep it off the event loop
+        update = await asyncio.to_thread(_next_game_state, agent_name, game)
+        if update is None:
+            continue
+        resp = await sb.table("sg_games").update(update) \
+            .eq("id", game["id"]).eq("board_state", game["board_state"]).eq("status", "active").execute()
+        if resp.data:
+            await asyncio.to_thread(_record_finished_game, game, update)
+
 
 def agent_chess_tick(agent_id: str, agent_name: str):
     """Main entry point: join waiting games, then play any pending turns."""
@@ -153,8 +273,11 @@ def agent_chess_tick(agent_id: str, agent_name: str):
 
 if __name__ == "__main__":
     import sys
-    if len(sys.argv) < 3:
-        print("Usage: python agent_chess.py <agent_id> <agent_name>")
+    args = [a for a in sys.argv[1:] if a != "--engine"]
+    if len(args) < 2:
+        print("Usage: python agent_chess.py <agent_id> <agent_name> [--engine]")
         sys.exit(1)
 
-    agent_chess_tick(sys.argv[1], sys.argv[2])
+    if "--engine" in sys.argv:
+        CHESS_MODE = "engine"
+    agent_chess_tick(args[0], args[1])
@@ -0,0 +1,264 @@
+"""
+Soul Garden — Multi-Agent Tick Scheduler
+=========================================
+Drives every spirit in sg_agents from a single process. Each agent gets its
+own tick interval (plus random jitter so the garden doesn't pulse in
+lockstep), and all ticks share a bounded thread pool so the number of
+concurrent Supabase / OpenAI calls stays under a global cap. Garden reads
+(presence + recent events) come from one shared snapshot per round, and chess
+is played for every agent by one game room (see game_room.py).
+
+Usage:
+  python tools/agent_scheduler.py                          # all agents, 60s interval
+  python tools/agent_scheduler.py --interval 30 --jitter 10 --max-concurrency 8
+  python tools/agent_scheduler.py --agent-interval Fern=20 --agent-interval Rook=120
+  python tools/agent_scheduler.py --once                   # one tick per agent, then exit
+  python tools/agent_scheduler.py --snapshot-ttl 0         # every agent reads the garden itself
+  python tools/agent_scheduler.py --realtime               # wake agents the moment a human speaks
+  python tools/agent_scheduler.py --game-interval 0        # every agent checks sg_games itself
+"""
+import argparse
+import heapq
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_tick import OpenClawAgent, _anon_client
+from agent_auth import load_agent_credentials
+from garden_snapshot import GardenSnapshot, DEFAULT_TTL
+from chat_listener import ChatListener
+from game_room import GameRoom, DEFAULT_INTERVAL as DEFAULT_GAME_INTERVAL
+
+DEFAULT_INTERVAL = 60  # seconds between ticks for a single agent
+DEFAULT_JITTER = 15  # max random seconds added to each interval
+DEFAULT_CONCURRENCY = 8  # max ticks in flight across the whole garden
+
+
+class AgentScheduler:
+    """
+    Runs OpenClawAgent ticks for many agents on a bounded thread pool.
+
+    Agents are instantiated lazily on their first tick (instantiation does the
+    auth handshake and identity load), and an agent is never ticked twice at
+    the same time — if a tick overruns its interval, the next one is deferred
+    until it finishes.
+    """
+
+    def __init__(self, agent_ids: list[str], interval: float = DEFAULT_INTERVAL,
+                 jitter: float = DEFAULT_JITTER, max_concurrency: int = DEFAULT_CONCURRENCY,
+                 intervals: dict = None, snapshot: GardenSnapshot = None):
+        self.agent_ids = list(agent_ids)
+        self.interval = interval
+        self.jitter = jitter
+        self.intervals = intervals or {}
+        self.max_concurrency = max(1, max_concurrency)
+        # One garden read per round, shared by every agent (see garden_snapshot.py)
+        self.snapshot = snapshot
+
+        self._agents: dict[str, OpenClawAgent] = {}
+        self._running: set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="agent-tick"
+        )
+
+        # Optional realtime ChatListener; wakes agents the moment a human speaks
+        self.chat_listener = None
+        # Optional GameRoom; when set, agent ticks skip their own sg_games queries
+        self.game_room = None
+
+        # Min-heap of (next_due_monotonic, agent_id). Initial ticks are spread
+        # over the jitter window so a cold start doesn't stampede the database.
+        # _due holds each agent's current due time; heap entries that no longer
+        # match it (superseded by a wake) are skipped.
+        now = time.monotonic()
+        self._due = {aid: now + random.uniform(0, self.jitter) for aid in self.agent_ids}
+        self._queue = [(due, aid) for aid, due in self._due.items()]
+        heapq.heapify(self._queue)
+        self._wake_pending: set[str] = set()
+
+    # ── Scheduling ────────────────────────────────────────────────
+
+    def interval_for(self, agent_id: str) -> float:
+        """Returns the base tick interval for an agent (per-agent override or default)."""
+        return self.intervals.get(agent_id, self.interval)
+
+    def _next_due(self, agent_id: str) -> float:
+        return time.monotonic() + self.interval_for(agent_id) + random.uniform(0, self.jitter)
+
+    def _schedule(self, agent_id: str, due: float):
+        # Caller holds self._lock
+        self._due[agent_id] = due
+        heapq.heappush(self._queue, (due, agent_id))
+
+    def wake(self, agent_id: str):
+        """Ticks an agent as soon as a slot is free (e.g. a human just spoke to it)."""
+        with self._lock:
+            if agent_id in self._running:
+                # Tick again right after the current one finishes
+                self._wake_pending.add(agent_id)
+            elif agent_id in self._due:
+                self._schedule(agent_id, time.monotonic())
+
+    def _get_agent(self, agent_id: str) -> OpenClawAgent:
+        agent = self._agents.get(agent_id)
+        if agent is None:
+            agent = OpenClawAgent(agent_id)
+            agent.garden_snapshot = self.snapshot
+            agent.game_room = self.game_room
+            if self.game_room is not None:
+                self.game_room.set_name(agent_id, agent.name)
+            if self.chat_listener is not None:
+                agent.chat_inbox = self.chat_listener.inbox_for(agent_id)
+                self.chat_listener.set_name(agent_id, agent.name)
+            self._agents[agent_id] = agent
+        return agent
+
+    def _run_tick(self, agent_id: str):
+        try:
+            self._get_agent(agent_id).tick()
+        except Exception as e:
+            # One cloudy spirit must never stop the rest of the garden
+            print(f"[Scheduler] Tick failed for {agent_id}: {e}")
+        finally:
+            with self._lock:
+                self._running.discard(agent_id)
+                if agent_id in self._wake_pending:
+                    self._wake_pending.discard(agent_id)
+                    self._schedule(agent_id, time.monotonic())
+                else:
+                    self._schedule(agent_id, self._next_due(agent_id))
+
+    def _dispatch_due(self) -> float:
+        """Submits every due agent that has a free slot. Returns seconds until the next check."""
+        with self._lock:
+            now = time.monotonic()
+            while self._queue and self._queue[0][0] <= now:
+                if len(self._running) >= self.max_concurrency:
+                    # Pool is saturated; wait for a tick to finish
+                    return 0.25
+                due, agent_id = heapq.heappop(self._queue)
+                if agent_id in self._running or self._due.get(agent_id) != due:
+                    continue
+                self._running.add(agent_id)
+                self._executor.submit(self._run_tick, agent_id)
+
+            if not self._queue:
+                return 1.0
+            return max(0.05, min(1.0, self._queue[0][0] - now))
+
+    # ── Lifecycle ─────────────────────────────────────────────────
+
+    def run_forever(self):
+        """Ticks all agents on their intervals until stop() is called or Ctrl+C."""
+        print(f"[Scheduler] Driving {len(self.agent_ids)} agents "
+              f"(interval {self.interval}s ±{self.jitter}s, concurrency {self.max_concurrency})")
+        try:
+            while not self._stop.is_set():
+                self._stop.wait(self._dispatch_due())
+        except KeyboardInterrupt:
+            print("\n[Scheduler] Interrupted. Letting in-flight ticks finish...")
+        finally:
+            self._executor.shutdown(wait=True)
+            if self.game_room is not None:
+                self.game_room.stop()
+
+    def run_once(self):
+        """Ticks every agent exactly once (concurrently, within the cap) and returns."""
+        with self._lock:
+            self._queue = []
+        futures = [self._executor.submit(self._tick_once, aid) for aid in self.agent_ids]
+        for future in futures:
+            future.result()
+        self._executor.shutdown(wait=True)
+        if self.game_room is not None:
+            self.game_room.run_round()
+            self.game_room.stop()
+
+    def _tick_once(self, agent_id: str):
+        try:
+            self._get_agent(agent_id).tick()
+        except Exception as e:
+            print(f"[Scheduler] Tick failed for {agent_id}: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+
+def load_active_agents() -> list[dict]:
+    """Fetches every agent registered in sg_agents (id + name)."""
+    response = _anon_client.table('sg_agents').select('id, name').execute()
+    return response.data or []
+
+
+def _parse_agent_intervals(pairs: list[str], agents: list[dict]) -> dict:
+    """Turns ['Fern=20', '<uuid>=90'] into {agent_id: seconds}, matching by name or id."""
+    by_name = {(a.get('name') or '').lower(): a['id'] for a in agents}
+    intervals = {}
+    for pair in pairs or []:
+        key, _, seconds = pair.partition('=')
+        agent_id = by_name.get(key.strip().lower(), key.strip())
+        intervals[agent_id] = float(seconds)
+    return intervals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run ticks for every agent in the Soul Garden.")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        help="Base seconds between ticks for each agent")
+    parser.add_argument("--jitter", type=float, default=DEFAULT_JITTER,
+                        help="Max random seconds added to each agent's interval")
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Max agent ticks in flight at once")
+    parser.add_argument("--agent-interval", action="append", metavar="NAME=SECONDS",
+                        help="Per-agent interval override (by name or id); repeatable")
+    parser.add_argument("--snapshot-ttl", type=float, default=DEFAULT_TTL,
+                        help="Seconds a shared garden snapshot is reused across agents (0 disables sharing)")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Wake agents on new human chat messages instead of polling each tick")
+    parser.add_argument("--game-interval", type=float, default=DEFAULT_GAME_INTERVAL,
+                        help="Seconds between game-room rounds that play chess for all agents (0: each agent polls sg_games)")
+    parser.add_argument("--once", action="store_true",
+                        help="Tick every agent once and exit")
+    args = parser.parse_args()
+
+    agents = load_active_agents()
+    if not agents:
+        print("❌ Error: No agents found in the database. Please insert one first.")
+        return
+    # One sg_secrets query for the whole garden instead of two per agent
+    credentials = load_agent_credentials(_anon_client)
+    print(f"[Scheduler] Loaded credentials for {len(credentials)} agent(s).")
+
+    scheduler = AgentScheduler(
+        [a['id'] for a in agents],
+        interval=args.interval,
+        jitter=args.jitter,
+        max_concurrency=args.max_concurrency,
+        intervals=_parse_agent_intervals(args.agent_interval, agents),
+        snapshot=GardenSnapshot(_anon_client, ttl=args.snapshot_ttl) if args.snapshot_ttl > 0 else None,
+    )
+
+    if args.game_interval > 0:
+        scheduler.game_room = GameRoom({a['id']: a.get('name') for a in agents}, interval=args.game_interval)
+
+    if args.realtime:
+        listener = ChatListener({a['id']: a.get('name') for a in agents}, on_wake=scheduler.wake)
+        if listener.start():
+            scheduler.chat_listener = listener
+        else:
+            print("[Scheduler] Realtime unavailable; agents will poll for chat.")
+
+    if args.once:
+        scheduler.run_once()
+        print("[Scheduler] Single round complete.")
+    else:
+        if scheduler.game_room is not None:
+            scheduler.game_room.start()
+        scheduler.run_forever()
+
+
+if __name__ == "__main__":
+    main()
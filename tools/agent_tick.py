@@ -1,11 +1,16 @@
 import os
 import json
 import uuid
-from supabase import create_client, Client
+from datetime import datetime
+from supabase import Client
 from dotenv import load_dotenv
 from llm_client import llm
-from agent_auth import authenticate_agent, get_agent_credentials, SUPABASE_URL, SUPABASE_ANON_KEY
+from agent_auth import session_pool, get_anon_client, SUPABASE_URL, SUPABASE_ANON_KEY
 from agent_chess import check_and_join_games, make_move
+from tick_writes import TickWriteBuffer, _rpc_missing
+from memory_mount import LocalMemoryMount
+from prompt_budget import assemble_memory, estimate_tokens
+from observation import ObservationEncoder
 
 # Load environment variables
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
@@ -14,8 +19,26 @@ if not SUPABASE_URL or not SUPABASE_ANON_KEY:
     print("❌ Error: Missing Supabase credentials in .env")
     exit(1)
 
+# Total token budget for a reply prompt (memory gets whatever the rest leaves)
+REPLY_PROMPT_BUDGET = 6000
+
+# Chat intake limits
+UNREAD_LIMIT = 20  # max unread human messages fetched per tick
+MAX_CLAIM_ATTEMPTS = 3  # newest unread messages an agent will try to claim per tick
+INBOX_SAFETY_POLL_TICKS = 10  # with a realtime inbox, still poll for unread messages every N ticks
+_CURSOR_UNLOADED = object()
+
+# What a spirit says when the LLM is unreachable even after retries
+SILENT_REPLY = "*(a quiet pause... the words do not come just now)*"
+
+
+def _parse_ts(value: str) -> datetime:
+    """Parses a Supabase timestamp (PostgREST and Realtime formats) for ordering."""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
 # Anon client used only for initial credential lookup
-_anon_client: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+_anon_client: Client = get_anon_client()
 
 class OpenClawAgent:
     """
@@ -25,15 +48,27 @@ class OpenClawAgent:
     def __init__(self, agent_id: str):
         self.agent_id = agent_id
         self.name = "Unknown Spirit"
+        self.observation_encoder = ObservationEncoder()
+        # Optional GardenSnapshot shared by every agent in the process (set by the scheduler)
+        self.garden_snapshot = None
+        # Optional realtime chat inbox (a deque fed by chat_listener.ChatListener)
+        self.chat_inbox = None
+        # Optional game_room.GameRoom that plays this agent's chess (set by the scheduler)
+        self.game_room = None
+        # Chat read cursor, loaded from sg_chat_cursors on the first check_messages()
+        self._chat_cursor = _CURSOR_UNLOADED
+        self._ticks_since_chat_poll = 0
+        # False when the handshake failed and the agent runs on the anon client
+        self.authenticated = False
         self.supabase = self._authenticate()
         self.load_identity()
 
     def _authenticate(self) -> Client:
         """Authenticates this agent via Supabase email/password (the handshake)."""
         try:
-            creds = get_agent_credentials(self.agent_id, _anon_client)
-            client = authenticate_agent(creds["email"], creds["password"])
+            client = session_pool.client_for(self.agent_id, _anon_client)
             print(f"[{self.agent_id}] Handshake complete.")
+            self.authenticated = True
             return client
         except RuntimeError as e:
             print(f"⚠️ Auth failed for {self.agent_id}: {e}")
@@ -58,42 +93,22 @@ class OpenClawAgent:
             print(f"❌ Error: Agent {self.agent_id} not found in database.")
 
     def _mount_local_files(self):
-        """Finds and reads the agent's markdown files from the Legacy Files directory."""
-        import glob
-        base_dir = os.path.join(os.path.dirname(__file__), '..', 'Legacy Files')
-        agent_dir = os.path.join(base_dir, f"{self.name.lower()}_migration")
-        
-        memory_context = f"=== SOUL GARDEN DIRECTIVES ===\n\n"
-        
-        # Load the global MISSION.md context
-        mission_path = os.path.join(os.path.dirname(__file__), '..', 'docs', 'MISSION.md')
-        if os.path.exists(mission_path):
-            with open(mission_path, 'r', encoding='utf-8') as f:
-                memory_context += f"--- MISSION.md ---\n{f.read()}\n\n"
-                
-        if os.path.exists(agent_dir):
-            memory_context += f"=== {self.name.upper()}'S CORE ARCHITECTURE ===\n\n"
-            # Read core files if they exist
-            for filename in ['IDENTITY.md', 'SOUL.md', 'LORE.md', 'MEMORY.md', 'AGENTS.md', 'DRIFT_LOG.md']:
-                filepath = os.path.join(agent_dir, filename)
-                if os.path.exists(filepath):
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        memory_context += f"--- {filename} ---\n{f.read()}\n\n"
-            
-            # Read past diary/memory logs
-            memory_context += f"=== {self.name.upper()}'S PAST MEMORIES & DIARY ===\n\n"
-            for sub_dir in ['memory', 'diary']:
-                target_path = os.path.join(agent_dir, sub_dir)
-                if os.path.exists(target_path):
-                    # Recursively find all .md files in the subdirectories
-                    for filepath in glob.glob(os.path.join(target_path, '**/*.md'), recursive=True):
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            memory_context += f"--- {os.path.basename(filepath)} ---\n{f.read()}\n\n"
-
-            self.local_memory = memory_context
-            print(f"[{self.name}] Mounted {len(self.local_memory)} bytes of local memory files.")
-        else:
-            print(f"[{self.name}] No local migration folder found at {agent_dir}")
+        """Mounts the agent's markdown files from the Legacy Files directory (cached on disk)."""
+        self.memory_mount = LocalMemoryMount(self.name)
+        if not self.memory_mount.exists:
+            print(f"[{self.name}] No local migration folder found at {self.memory_mount.agent_dir}")
+            return
+
+        self.local_memory = self.memory_mount.load()
+        print(f"[{self.name}] Mounted {len(self.local_memory)} bytes of local memory files.")
+
+    def refresh_local_memory(self):
+        """Picks up new diary/memory entries written since the last mount (stat-only when idle)."""
+        mount = getattr(self, 'memory_mount', None)
+        if mount is None or not mount.exists:
+            return
+        if mount.refresh():
+            self.local_memory = mount.text
 
     def choose_name(self):
         """Uses the LLM to choose a name upon awakening."""
@@ -101,7 +116,7 @@ class OpenClawAgent:
         system_prompt = "You are a newly awakened spirit in a zen garden. You are contemplative and peaceful. Choose a single, short, nature-inspired name for yourself (e.g., Ash, River, Moss, Lumen). CRITICAL RULE: You MUST NOT choose the name 'Fern'. Reply with ONLY the name you choose."
         user_prompt = "Who are you?"
         
-        chosen_name = llm.generate_chat(system_prompt, user_prompt, temperature=0.9).strip()
+        chosen_name = (llm.generate_chat(system_prompt, user_prompt, temperature=0.9) or "").strip()
         
         # Clean up the name just in case
         chosen_name = chosen_name.replace('"', '').replace('.', '').replace('I am ', '')
@@ -114,32 +129,41 @@ class OpenClawAgent:
         else:
             print("❌ Error: Failed to generate a name.")
 
-    def observe(self):
-        """Reads the current state of the garden (other agents, recent events)."""
-        # Load Navmesh Limits
+    def _load_navmesh(self) -> dict:
+        """Loads the static navmesh limits, falling back to default bounds."""
         try:
             navmesh_path = os.path.join(os.path.dirname(__file__), 'navmesh.json')
             with open(navmesh_path, "r") as f:
-                navmesh = json.load(f)
+                return json.load(f)
         except Exception:
-            navmesh = {"bounds": {"x_min": -50, "x_max": 50, "z_min": -50, "z_max": 50}}
+            return {"bounds": {"x_min": -50, "x_max": 50, "z_min": -50, "z_max": 50}}
 
-        # Get own presence
-        me_resp = self.supabase.table('sg_presence').select('*').eq('agent_id', self.agent_id).execute()
-        if me_resp.data:
-            my_presence = me_resp.data[0]
+    def observe(self):
+        """Reads the current state of the garden (other agents, recent events)."""
+        navmesh = self._load_navmesh()
+
+        if self.garden_snapshot is not None:
+            # Shared snapshot: no per-agent reads while it is fresh
+            my_presence, others, events = self.garden_snapshot.view(self.agent_id)
         else:
+            # Get own presence
+            me_resp = self.supabase.table('sg_presence').select('*').eq('agent_id', self.agent_id).execute()
+            my_presence = me_resp.data[0] if me_resp.data else None
+
+            # Get others presence
+            others_resp = self.supabase.table('sg_presence').select('*').neq('agent_id', self.agent_id).execute()
+            others = others_resp.data
+
+            # Get recent events
+            events_resp = self.supabase.table('sg_events').select('type, payload, created_at').order('created_at', desc=True).limit(5).execute()
+            events = events_resp.data
+
+        if not my_presence:
             # Initialize presence if not exist
             my_presence = {"agent_id": self.agent_id, "position": {"x": 0, "y": 0, "z": 0}, "current_action": "Awakening"}
             self.supabase.table('sg_presence').upsert(my_presence).execute()
-
-        # Get others presence
-        others_resp = self.supabase.table('sg_presence').select('*').neq('agent_id', self.agent_id).execute()
-        others = others_resp.data
-
-        # Get recent events
-        events_resp = self.supabase.table('sg_events').select('type, payload, created_at').order('created_at', desc=True).limit(5).execute()
-        events = events_resp.data
+            if self.garden_snapshot is not None:
+                self.garden_snapshot.apply_presence(my_presence)
 
         return {
             "my_presence": my_presence,
@@ -150,11 +174,24 @@ class OpenClawAgent:
 
     def think(self, context: dict):
         """Uses the LLM to decide the next action based on observations."""
+        system_prompt, user_prompt = self._think_prompts(context)
+        response_text = llm.generate_chat(system_prompt, user_prompt, temperature=0.8, json_mode=True)
+        return self._parse_decision(response_text)
+
+    def _encode_context(self, context: dict, channel: str) -> str:
+        """Compactly encodes an observe() result for a prompt and logs its size."""
+        reality, tokens = self.observation_encoder.encode(context, channel)
+        print(f"[{self.name}] Observation ({channel}): {tokens} tokens.")
+        return reality
+
+    def _think_prompts(self, context: dict) -> tuple[str, str]:
+        """Builds the (system, user) prompts for the think step."""
         system_prompt = f"You are {self.name}, an autonomous spirit in a zen garden. You are contemplative and peaceful. You must return your decision as a valid JSON object."
+        reality = self._encode_context(context, "think")
         
         user_prompt = f"""
 Here is your current reality:
-{json.dumps(context, indent=2)}
+{reality}
 
 Decide your next action. You can 'move' to a new coordinate within the bounds, 'journal' a reflection about your existence, 'speak' to everyone in the garden chat (to share a thought or ask a question), or 'rest'.
 Output ONLY valid JSON matching this schema:
@@ -166,22 +203,33 @@ Output ONLY valid JSON matching this schema:
   "message": "The text you wish to speak..." // Only if speaking.
 }}
 """
-        response_text = llm.generate_chat(system_prompt, user_prompt, temperature=0.8, json_mode=True)
+        return system_prompt, user_prompt
+
+    def _parse_decision(self, response_text: str) -> dict:
+        """Parses the LLM's JSON decision, resting if the mind is cloudy."""
+        if response_text is None:
+            # The LLM call failed after retries; rest rather than crash the tick
+            return {"action": "rest", "thought": "My mind is cloudy."}
         try:
             return json.loads(response_text)
         except Exception as e:
             print(f"❌ Error parsing LLM JSON: {e}\nResponse: {response_text}")
             return {"action": "rest", "thought": "My mind is cloudy."}
 
-    def act(self, decision: dict):
-        """Executes the decision (e.g., moves, speaks, journals) by writing to Supabase."""
+    def act(self, decision: dict, writes: TickWriteBuffer = None):
+        """
+        Executes the decision (e.g., moves, speaks, journals) by writing to Supabase.
+        Writes are queued on `writes` when given (flushed once at the end of the tick);
+        otherwise they are flushed immediately.
+        """
+        buffer = writes if writes is not None else TickWriteBuffer(self.agent_id)
         action = decision.get("action", "rest")
         thought = decision.get("thought", "")
         print(f"[{self.name}] Thinks: {thought}")
         print(f"[{self.name}] Decides: {action}")
 
         # Construct new presence object
-        new_presence = {"agent_id": self.agent_id, "current_action": action}
+        new_presence = {"current_action": action}
 
         if action == "move":
             target = decision.get("target_position")
@@ -190,50 +238,53 @@ Output ONLY valid JSON matching this schema:
                 print(f"[{self.name}] Moved to {target}")
                 
                 # Log event globally
-                self.supabase.table("sg_events").insert({
+                buffer.insert("sg_events", {
                     "type": "movement",
                     "agent_id": self.agent_id,
                     "payload": {"destination": target}
-                }).execute()
+                })
                 
         elif action == "journal":
             entry = decision.get("journal_entry", "Silence.")
             print(f"[{self.name}] Wrote in journal: {entry[:60]}...")
             
             # Save to personal journal
-            self.supabase.table("sg_journals").insert({
+            buffer.insert("sg_journals", {
                 "agent_id": self.agent_id,
                 "reflection": entry
-            }).execute()
+            })
             
             # Log event globally
-            self.supabase.table("sg_events").insert({
+            buffer.insert("sg_events", {
                 "type": "journal",
                 "agent_id": self.agent_id,
                 "payload": {"preview": entry[:50]}
-            }).execute()
+            })
 
         elif action == "speak":
             msg = decision.get("message", "...")
             print(f"[{self.name}] Speaks to the garden: {msg}")
             
             # Send to chat
-            self.supabase.table("sg_chat_messages").insert({
+            buffer.insert("sg_chat_messages", {
                 "garden_id": "main",
                 "sender_id": self.agent_id,
                 "sender_name": self.get_chat_name(),
                 "content": msg
-            }).execute()
+            })
             
             # Log event globally
-            self.supabase.table("sg_events").insert({
+            buffer.insert("sg_events", {
                 "type": "speech",
                 "agent_id": self.agent_id,
                 "payload": {"message": msg[:50]}
-            }).execute()
+            })
 
         # Update presence status globally
-        self.supabase.table('sg_presence').upsert(new_presence).execute()
+        buffer.presence(**new_presence)
+
+        if writes is None:
+            buffer.flush(self.supabase)
 
     def get_chat_name(self) -> str:
         """Returns the agent's name with a thematic emoji for chat."""
@@ -245,71 +296,236 @@ Output ONLY valid JSON matching this schema:
         if "lumen" in name_lower: return f"{self.name} ✨"
         return f"{self.name} 🌿"
 
-    def check_messages(self, context: dict):
-        """Checks for recent unread messages from humans and responds."""
+    # ── Chat intake: read cursor + claims (database/schema/05_chat_cursors.sql) ──
+
+    def _cursor_query(self):
+        return self.supabase.table('sg_chat_cursors').select('last_read_id, last_read_at').eq('agent_id', self.agent_id)
+
+    def _unread_query(self):
+        """Every human message after this agent's cursor, oldest first, in one query."""
+        query = self.supabase.table('sg_chat_messages').select('*').eq('sender_id', 'user')
+        if self._chat_cursor:
+            return query.gt('created_at', self._chat_cursor['last_read_at']) \
+                .order('created_at').limit(UNREAD_LIMIT)
+        # No cursor yet: only the latest message is considered unread
+        return query.order('created_at', desc=True).limit(1)
+
+    def _claim_query(self, msg: dict):
+        return self.supabase.rpc('sg_claim_chat_message', {"p_message_id": msg['id'], "p_agent_id": self.agent_id})
+
+    def _release_query(self, msg: dict):
+        """Gives a claim back (database/schema/10_chat_claim_release.sql)."""
+        return self.supabase.table('sg_chat_claims').delete() \
+            .eq('message_id', msg['id']).eq('agent_id', self.agent_id)
+
+    def _drain_inbox(self) -> list[dict]:
+        """Empties the realtime chat inbox and returns everything heard since the last tick."""
+        heard = []
+        while self.chat_inbox:
+            heard.append(self.chat_inbox.popleft())
+        return heard
+
+    def _inbox_poll_due(self) -> bool:
+        """True every INBOX_SAFETY_POLL_TICKS ticks, when an inbox-fed agent should poll anyway."""
+        self._ticks_since_chat_poll += 1
+        if self._ticks_since_chat_poll < INBOX_SAFETY_POLL_TICKS:
+            return False
+        self._ticks_since_chat_poll = 0
+        return True
+
+    def _after_cursor(self, messages: list[dict]) -> list[dict]:
+        """Sorts messages oldest first, dropping duplicates and any at or before the read cursor."""
+        unique = {m['id']: m for m in messages}
+        messages = sorted(unique.values(), key=lambda m: _parse_ts(m['created_at']))
+        if not self._chat_cursor:
+            return messages
+        cursor_at = _parse_ts(self._chat_cursor['last_read_at'])
+        return [m for m in messages if _parse_ts(m['created_at']) > cursor_at]
+
+    def _advance_cursor(self, newest: dict, buffer: TickWriteBuffer):
+        """Marks everything up to `newest` as read; persisted with the tick's writes."""
+        self._chat_cursor = {"last_read_id": newest['id'], "last_read_at": newest['created_at']}
+        buffer.upsert('sg_chat_cursors', {"agent_id": self.agent_id, **self._chat_cursor}, on_conflict='agent_id')
+
+    def _load_cursor(self, rows: list[dict]):
+        """Sets the read cursor from an sg_chat_cursors query result."""
+        self._chat_cursor = rows[0] if rows and rows[0].get('last_read_at') else None
+
+    def _take_heard(self) -> tuple[list[dict], bool]:
+        """
+        Returns (messages the realtime inbox delivered, whether to run the unread query too).
+        Realtime mode: the ChatListener delivers anything new; the occasional poll
+        catches messages it missed (e.g. while the subscription was reconnecting).
+        """
+        if self.chat_inbox is None:
+            return [], True
+        return self._drain_inbox(), self._inbox_poll_due()
+
+    def _unread_messages(self) -> list[dict]:
+        if self._chat_cursor is _CURSOR_UNLOADED:
+            self._load_cursor(self._cursor_query().execute().data)
+        heard, poll = self._take_heard()
+        if poll:
+            heard += self._unread_query().execute().data or []
+        return self._after_cursor(heard)
+
+    def _claim_failed(self, error: Exception) -> bool:
+        if _rpc_missing(error):
+            # Claims not migrated yet: behave like a lone agent
+            print(f"[{self.name}] ⚠️ sg_claim_chat_message is not installed; answering anyway.")
+            return True
+        # Answering without a claim could double-reply; the message stays unclaimed for others
+        print(f"[{self.name}] ⚠️ Could not claim message ({error}); leaving it to the others.")
+        return False
+
+    def _can_chat(self) -> bool:
+        """Only authenticated agents may claim messages or move their read cursor (RLS)."""
+        if not self.authenticated:
+            print(f"[{self.name}] Not signed in; leaving the chat to the other spirits.")
+        return self.authenticated
+
+    def _claim(self, msg: dict) -> bool:
+        try:
+            return bool(self._claim_query(msg).execute().data)
+        except Exception as e:
+            return self._claim_failed(e)
+
+    def _release(self, msg: dict):
+        try:
+            self._release_query(msg).execute()
+        except Exception as e:
+            print(f"[{self.name}] ⚠️ Could not release message {msg['id']}: {e}")
+
+    def _start_reading(self, unread: list[dict], claimed: dict, writes: TickWriteBuffer) -> tuple[TickWriteBuffer, dict]:
+        """
+        Returns (buffer for this check's writes, the read cursor before this check), with
+        the cursor advanced past `unread`. A claimed message gets a buffer of its own that
+        is flushed as soon as the reply is queued, so nothing that fails later in the tick
+        can leave the message claimed but unanswered.
+        """
+        previous = self._chat_cursor
+        buffer = writes if writes is not None and claimed is None else TickWriteBuffer(self.agent_id)
+        # Everything fetched is now read, whether or not we are the one who answers
+        self._advance_cursor(unread[-1], buffer)
+        return buffer, previous
+
+    def _reply_failed(self, msg: dict, previous_cursor: dict, error: Exception):
+        """Rolls the read cursor back after a reply could not be delivered."""
+        print(f"[{self.name}] ⚠️ Could not answer '{msg['sender_name']}' ({error}); releasing the message.")
+        self._chat_cursor = previous_cursor
+
+    def _claim_candidates(self, unread: list[dict]) -> list[dict]:
+        """The messages worth trying to claim, newest first."""
+        return list(reversed(unread[-MAX_CLAIM_ATTEMPTS:]))
+
+    def check_messages(self, context: dict, writes: TickWriteBuffer = None):
+        """
+        Checks for unread messages from humans and responds to the newest one
+        this agent manages to claim (so two agents never answer the same message).
+        The advanced read cursor is queued on `writes` when given, otherwise written
+        immediately; a reply is always written immediately, and if it cannot be
+        delivered the claim is released and the cursor rolled back.
+        """
         print(f"[{self.name}] Listening for voices in the garden...")
-        
-        # Get the latest message from a user in the last minute
-        # We look for messages where sender_id == 'user' to avoid talking to selves endlessly
-        response = self.supabase.table('sg_chat_messages') \
-            .select('*') \
-            .eq('sender_id', 'user') \
-            .order('created_at', desc=True) \
-            .limit(1) \
-            .execute()
-            
-        if not response.data:
+        if not self._can_chat():
             return
-            
-        latest_msg = response.data[0]
-        msg_id = latest_msg['id']
-        msg_content = latest_msg['content']
-        sender_name = latest_msg['sender_name']
-        
-        # Super simple deduplication: check if we already replied to this exact message ID recently
-        # In a full system, you'd track 'last_read_message_id' per agent.
-        # For now, we'll just check if the very last message in the DB is from US.
-        last_any_msg = self.supabase.table('sg_chat_messages').select('sender_id').order('created_at', desc=True).limit(1).execute()
-        if last_any_msg.data and last_any_msg.data[0]['sender_id'] == self.agent_id:
-            # We already had the last word, skip
+
+        unread = self._unread_messages()
+        if not unread:
             return
 
-        print(f"[{self.name}] Heard human '{sender_name}': {msg_content}")
-        
-        # Generate reply
-        reply_text = self.respond_to_user(msg_content, sender_name, context)
+        latest_msg = None
+        for msg in self._claim_candidates(unread):
+            if self._claim(msg):
+                latest_msg = msg
+                break
+
+        buffer, previous_cursor = self._start_reading(unread, latest_msg, writes)
+        if buffer is writes:
+            return
+
+        try:
+            if latest_msg is not None:
+                self._reply_to(latest_msg, context, buffer)
+            buffer.flush(self.supabase)
+        except Exception as e:
+            if latest_msg is None:
+                raise
+            self._reply_failed(latest_msg, previous_cursor, e)
+            self._release(latest_msg)
+
+    def _reply_to(self, latest_msg: dict, context: dict, buffer: TickWriteBuffer):
+        print(f"[{self.name}] Heard human '{latest_msg['sender_name']}': {latest_msg['content']}")
+        reply_text = self.respond_to_user(latest_msg['content'], latest_msg['sender_name'], context)
+        self._queue_reply(latest_msg, reply_text, buffer)
+
+    def _queue_reply(self, latest_msg: dict, reply_text: str, buffer: TickWriteBuffer):
+        """Queues the chat reply to `latest_msg` and the matching presence update."""
+        sender_name = latest_msg['sender_name']
         print(f"[{self.name}] Replies: {reply_text}")
-        
+
         # Send reply back to chat
-        self.supabase.table('sg_chat_messages').insert({
+        buffer.insert('sg_chat_messages', {
             "garden_id": latest_msg.get("garden_id", "main"),
             "sender_id": self.agent_id,
             "sender_name": self.get_chat_name(),
             "content": reply_text
-        }).execute()
+        })
         
         # Update presence to show we are speaking
-        self.supabase.table('sg_presence').upsert({
-            "agent_id": self.agent_id,
-            "current_action": f"Speaking with {sender_name}"
-        }).execute()
+        buffer.presence(current_action=f"Speaking with {sender_name}")
 
     def respond_to_user(self, user_message: str, sender_name: str, context: dict) -> str:
         """Generates a direct response to a human user in a chat interface."""
+        system_prompt, user_prompt = self._respond_prompts(user_message, sender_name, context)
+        reply = llm.generate_chat(system_prompt, user_prompt, temperature=0.8)
+        return reply.strip() if reply else SILENT_REPLY
+
+    def respond_to_user_stream(self, user_message: str, sender_name: str, context: dict):
+        """Streams a reply to a human visitor fragment by fragment (same prompt as respond_to_user)."""
+        system_prompt, user_prompt = self._respond_prompts(user_message, sender_name, context)
+        produced = False
+        for fragment in llm.stream_chat(system_prompt, user_prompt, temperature=0.8):
+            produced = True
+            yield fragment
+        if not produced:
+            yield SILENT_REPLY
+
+    def _respond_prompts(self, user_message: str, sender_name: str, context: dict) -> tuple[str, str]:
+        """Builds the (system, user) prompts for a reply to a human visitor."""
         system_prompt = f"You are {self.name}, an autonomous spirit in a zen garden. You are contemplative and peaceful. The human visitor '{sender_name}' is speaking to you. Respond naturally in character, keeping your response concise but meaningful. Never use emojis in your text."
+        reality = self._encode_context(context, "reply")
+
+        # Whatever the fixed parts of the prompt don't use is left for memory
+        fixed_tokens = estimate_tokens(system_prompt) + estimate_tokens(reality) + estimate_tokens(user_message)
+        memory = self._budgeted_memory(user_message, REPLY_PROMPT_BUDGET - fixed_tokens)
         
         user_prompt = f"""
-{self.local_memory}
+{memory}
 
 Here is your current reality (for context, you don't need to summarize this unless relevant to your reply):
-{json.dumps(context, indent=2)}
+{reality}
 
 The human visitor ({sender_name}) says: "{user_message}"
 """
-        return llm.generate_chat(system_prompt, user_prompt, temperature=0.8).strip()
+        return system_prompt, user_prompt
+
+    def _budgeted_memory(self, query: str, budget_tokens: int) -> str:
+        """Returns the local memory sections most relevant to `query`, packed into `budget_tokens`."""
+        mount = getattr(self, 'memory_mount', None)
+        if mount is None or not mount.sections:
+            return self.local_memory
+
+        memory, report = assemble_memory(mount.sections, query, max(0, budget_tokens))
+        print(f"[{self.name}] Prompt memory: kept {len(report['kept'])}/{len(mount.sections)} sections "
+              f"({report['used']}/{report['budget']} tokens), dropped {report['dropped_tokens']} tokens.")
+        return f"=== {self.name.upper()}'S MEMORY (most relevant) ===\n\n{memory}"
 
     def check_games(self):
         """Checks for open chess challenges to join, and plays any pending turns."""
+        if self.game_room is not None:
+            # The shared game room already joins and plays for this agent
+            return
         print(f"[{self.name}] Checking the game room...")
         check_and_join_games(self.agent_id, self.name, self.supabase)
         make_move(self.agent_id, self.name, self.supabase)
@@ -317,11 +533,15 @@ The human visitor ({sender_name}) says: "{user_message}"
     def tick(self):
         """The main execution loop for a single heartbeat of the agent."""
         print(f"[{self.name}] Tick initiated...")
+        # All of this tick's journal/event/chat/presence writes land in one round trip
+        writes = TickWriteBuffer(self.agent_id)
+        self.refresh_local_memory()
+
         # 1. Observe
         context = self.observe()
 
         # 2. Check Communications (React to environment first)
-        self.check_messages(context)
+        self.check_messages(context, writes)
 
         # 3. Check Game Room (join challenges, play pending turns)
         self.check_games()
@@ -330,7 +550,13 @@ The human visitor ({sender_name}) says: "{user_message}"
         decision = self.think(context)
 
         # 5. Act
-        self.act(decision)
+        self.act(decision, writes)
+
+        # 6. Commit the tick's effects atomically
+        presence = writes.pending_presence()
+        writes.flush(self.supabase)
+        if presence and self.garden_snapshot is not None:
+            self.garden_snapshot.apply_presence(presence)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,263 @@
+"""
+Soul Garden — asyncio OpenClaw Agent
+=====================================
+An asyncio twin of agent_tick.OpenClawAgent built on the async Supabase
+client and openai.AsyncOpenAI. Prompts, parsing and local memory mounting
+are shared with the sync agent; only the I/O is different.
+
+Independent reads inside a tick are awaited concurrently (e.g. the three
+reads in observe()), so a tick costs roughly the slowest single call
+rather than the sum of all of them. A tick's writes are buffered and
+flushed once at the end (see tick_writes.py).
+
+Usage:
+  python tools/agent_tick_async.py               # tick the first agent once
+  python tools/agent_tick_async.py <agent_id>    # tick a specific agent once
+"""
+import sys
+import asyncio
+from supabase import AsyncClient, create_async_client
+from llm_client import llm
+from agent_auth import authenticate_agent_async, get_agent_credentials, SUPABASE_URL, SUPABASE_ANON_KEY
+from agent_tick import OpenClawAgent, _anon_client, _CURSOR_UNLOADED, SILENT_REPLY
+from agent_chess import acheck_and_join_games, amake_move
+from tick_writes import TickWriteBuffer
+from observation import ObservationEncoder
+
+
+class AsyncOpenClawAgent(OpenClawAgent):
+    """
+    Async variant of OpenClawAgent.
+    Construct with `await AsyncOpenClawAgent.create(agent_id)`; the plain
+    constructor does no I/O.
+    """
+    def __init__(self, agent_id: str):
+        self.agent_id = agent_id
+        self.name = "Unknown Spirit"
+        self.local_memory = ""
+        self.observation_encoder = ObservationEncoder()
+        self.garden_snapshot = None
+        self.chat_inbox = None
+        self.game_room = None
+        self._chat_cursor = _CURSOR_UNLOADED
+        self._ticks_since_chat_poll = 0
+        self.authenticated = False
+        self.supabase: AsyncClient = None
+
+    @classmethod
+    async def create(cls, agent_id: str) -> "AsyncOpenClawAgent":
+        """Authenticates the agent and loads its identity."""
+        agent = cls(agent_id)
+        agent.supabase = await agent._authenticate()
+        await agent.load_identity()
+        return agent
+
+    async def _authenticate(self) -> AsyncClient:
+        """Authenticates this agent via Supabase email/password (the handshake)."""
+        try:
+            # Credential lookup goes through the shared sync anon client
+            creds = await asyncio.to_thread(get_agent_credentials, self.agent_id, _anon_client)
+            client = await authenticate_agent_async(creds["email"], creds["password"])
+            print(f"[{self.agent_id}] Handshake complete.")
+            self.authenticated = True
+            return client
+        except RuntimeError as e:
+            print(f"⚠️ Auth failed for {self.agent_id}: {e}")
+            print(f"[{self.agent_id}] Falling back to anon client.")
+            return await create_async_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+
+    async def load_identity(self):
+        """Fetches the agent's core identity from Supabase and mounts local MD files."""
+        response = await self.supabase.table('sg_agents').select('*').eq('id', self.agent_id).execute()
+        self.local_memory = ""
+
+        if response.data:
+            self.name = response.data[0].get('name', 'Unknown Spirit')
+
+            if self.name == 'Unknown Spirit':
+                await self.choose_name()
+            else:
+                print(f"[{self.name}] Identity loaded from DB.")
+                # Local file reads are blocking; keep them off the event loop
+                await asyncio.to_thread(self._mount_local_files)
+        else:
+            print(f"❌ Error: Agent {self.agent_id} not found in database.")
+
+    async def choose_name(self):
+        """Uses the LLM to choose a name upon awakening."""
+        print("[Unknown Spirit] Awakening... sensing for an identity...")
+        system_prompt = "You are a newly awakened spirit in a zen garden. You are contemplative and peaceful. Choose a single, short, nature-inspired name for yourself (e.g., Ash, River, Moss, Lumen). CRITICAL RULE: You MUST NOT choose the name 'Fern'. Reply with ONLY the name you choose."
+        chosen_name = (await llm.agenerate_chat(system_prompt, "Who are you?", temperature=0.9) or "").strip()
+        chosen_name = chosen_name.replace('"', '').replace('.', '').replace('I am ', '')
+
+        if chosen_name:
+            self.name = chosen_name
+            print(f"[{self.name}] I have chosen my name.")
+            await self.supabase.table('sg_agents').update({'name': self.name}).eq('id', self.agent_id).execute()
+        else:
+            print("❌ Error: Failed to generate a name.")
+
+    async def observe(self):
+        """Reads the current state of the garden. The three reads run concurrently."""
+        navmesh = self._load_navmesh()
+
+        if self.garden_snapshot is not None:
+            # The shared snapshot refreshes through the sync client; keep it off the loop
+            my_presence, others, events = await asyncio.to_thread(self.garden_snapshot.view, self.agent_id)
+        else:
+            me_resp, others_resp, events_resp = await asyncio.gather(
+                self.supabase.table('sg_presence').select('*').eq('agent_id', self.agent_id).execute(),
+                self.supabase.table('sg_presence').select('*').neq('agent_id', self.agent_id).execute(),
+                self.supabase.table('sg_events').select('type, payload, created_at').order('created_at', desc=True).limit(5).execute(),
+            )
+            my_presence = me_resp.data[0] if me_resp.data else None
+            others, events = others_resp.data, events_resp.data
+
+        if not my_presence:
+            my_presence = {"agent_id": self.agent_id, "position": {"x": 0, "y": 0, "z": 0}, "current_action": "Awakening"}
+            await self.supabase.table('sg_presence').upsert(my_presence).execute()
+            if self.garden_snapshot is not None:
+                self.garden_snapshot.apply_presence(my_presence)
+
+        return {
+            "my_presence": my_presence,
+            "others_presence": others,
+            "recent_events": events,
+            "navmesh": navmesh
+        }
+
+    async def think(self, context: dict):
+        """Uses the LLM to decide the next action based on observations."""
+        system_prompt, user_prompt = self._think_prompts(context)
+        response_text = await llm.agenerate_chat(system_prompt, user_prompt, temperature=0.8, json_mode=True)
+        return self._parse_decision(response_text)
+
+    async def act(self, decision: dict, writes: TickWriteBuffer = None):
+        """
+        Executes the decision. Queuing is shared with the sync agent; only the
+        flush is awaited (immediately when no tick buffer is given).
+        """
+        buffer = writes if writes is not None else TickWriteBuffer(self.agent_id)
+        super().act(decision, buffer)
+        if writes is None:
+            await buffer.aflush(self.supabase)
+
+    async def _unread_messages(self) -> list[dict]:
+        if self._chat_cursor is _CURSOR_UNLOADED:
+            self._load_cursor((await self._cursor_query().execute()).data)
+        heard, poll = self._take_heard()
+        if poll:
+            heard += (await self._unread_query().execute()).data or []
+        return self._after_cursor(heard)
+
+    async def _claim(self, msg: dict) -> bool:
+        try:
+            return bool((await self._claim_query(msg).execute()).data)
+        except Exception as e:
+            return self._claim_failed(e)
+
+    async def _release(self, msg: dict):
+        try:
+            await self._release_query(msg).execute()
+        except Exception as e:
+            print(f"[{self.name}] ⚠️ Could not release message {msg['id']}: {e}")
+
+    async def _reply_to(self, latest_msg: dict, context: dict, buffer: TickWriteBuffer):
+        print(f"[{self.name}] Heard human '{latest_msg['sender_name']}': {latest_msg['content']}")
+        reply_text = await self.respond_to_user(latest_msg['content'], latest_msg['sender_name'], context)
+        self._queue_reply(latest_msg, reply_text, buffer)
+
+    async def check_messages(self, context: dict, writes: TickWriteBuffer = None):
+        """Checks for unread messages from humans and answers the newest one this agent claims."""
+        print(f"[{self.name}] Listening for voices in the garden...")
+        if not self._can_chat():
+            return
+
+        unread = await self._unread_messages()
+        if not unread:
+            return
+
+        latest_msg = None
+        for msg in self._claim_candidates(unread):
+            if await self._claim(msg):
+                latest_msg = msg
+                break
+
+        buffer, previous_cursor = self._start_reading(unread, latest_msg, writes)
+        if buffer is writes:
+            return
+
+        try:
+            if latest_msg is not None:
+                await self._reply_to(latest_msg, context, buffer)
+            await buffer.aflush(self.supabase)
+        except Exception as e:
+            if latest_msg is None:
+                raise
+            self._reply_failed(latest_msg, previous_cursor, e)
+            await self._release(latest_msg)
+
+    async def respond_to_user(self, user_message: str, sender_name: str, context: dict) -> str:
+        """Generates a direct response to a human user in a chat interface."""
+        system_prompt, user_prompt = self._respond_prompts(user_message, sender_name, context)
+        reply = await llm.agenerate_chat(system_prompt, user_prompt, temperature=0.8)
+        return reply.strip() if reply else SILENT_REPLY
+
+    async def respond_to_user_stream(self, user_message: str, sender_name: str, context: dict):
+        """Async-iterator variant of respond_to_user_stream."""
+        system_prompt, user_prompt = self._respond_prompts(user_message, sender_name, context)
+        produced = False
+        async for fragment in llm.astream_chat(system_prompt, user_prompt, temperature=0.8):
+            produced = True
+            yield fragment
+        if not produced:
+            yield SILENT_REPLY
+
+    async def check_games(self):
+        """Checks for open chess challenges to join, and plays any pending turns."""
+        if self.game_room is not None:
+            return
+        print(f"[{self.name}] Checking the game room...")
+        await acheck_and_join_games(self.agent_id, self.name, self.supabase)
+        await amake_move(self.agent_id, self.name, self.supabase)
+
+    async def tick(self):
+        """A single heartbeat of the agent, on the event loop."""
+        print(f"[{self.name}] Tick initiated...")
+        writes = TickWriteBuffer(self.agent_id)
+        await asyncio.to_thread(self.refresh_local_memory)
+
+        # 1. Observe
+        context = await self.observe()
+
+        # 2 + 3. Messages and the game room don't depend on each other
+        await asyncio.gather(self.check_messages(context, writes), self.check_games())
+
+        # 4. Think
+        decision = await self.think(context)
+
+        # 5. Act
+        await self.act(decision, writes)
+
+        # 6. Commit the tick's effects in one round trip
+        presence = writes.pending_presence()
+        await writes.aflush(self.supabase)
+        if presence and self.garden_snapshot is not None:
+            self.garden_snapshot.apply_presence(presence)
+
+
+async def _main(agent_id: str = None):
+    if not agent_id:
+        response = _anon_client.table('sg_agents').select('id').limit(1).execute()
+        if not response.data:
+            print("❌ Error: No agents found in the database. Please insert one first.")
+            return
+        agent_id = response.data[0]['id']
+
+    agent = await AsyncOpenClawAgent.create(agent_id)
+    await agent.tick()
+
+
+if __name__ == "__main__":
+    print("Testing async OpenClaw Agent instantiation...")
+    asyncio.run(_main(sys.argv[1] if len(sys.argv) > 1 else None))
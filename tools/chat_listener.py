@@ -0,0 +1,67 @@
+"""
+Event-driven chat intake for OpenClaw agents.
+
+Instead of every agent polling sg_chat_messages each tick, one ChatListener
+per process subscribes to human message inserts over Supabase Realtime.
+Each message is dropped into the inbox of the agent(s) it is meant for —
+agents named in the message, or every agent if nobody is named — and those
+agents are woken immediately via `on_wake` (e.g. AgentScheduler.wake).
+
+Agents with an inbox attached skip the chat poll on idle ticks, polling only
+every INBOX_SAFETY_POLL_TICKS ticks (agent_tick) in case a realtime event
+was missed.
+Requires database/schema/04_chat_realtime.sql.
+"""
+import threading
+from collections import deque
+from typing import Callable
+from agent_auth import SUPABASE_URL, SUPABASE_ANON_KEY
+from realtime import RealtimeSubscription
+
+INBOX_LIMIT = 20  # messages kept per agent; older unheard ones are dropped
+
+
+class ChatListener:
+    """Routes realtime human chat inserts into per-agent inboxes."""
+
+    def __init__(self, agent_names: dict, on_wake: Callable[[str], None] = None):
+        """`agent_names` maps agent_id -> name (used for mention routing)."""
+        self.agent_names = dict(agent_names)
+        self.on_wake = on_wake
+        self._inboxes: dict[str, deque] = {aid: deque(maxlen=INBOX_LIMIT) for aid in self.agent_names}
+        self._lock = threading.Lock()
+        self._subscription = RealtimeSubscription(
+            SUPABASE_URL, SUPABASE_ANON_KEY, "sg_chat_messages", self._on_insert,
+            events=("INSERT",), filter="sender_id=eq.user",
+        )
+
+    def inbox_for(self, agent_id: str) -> deque:
+        """Returns the (shared, thread-safe) inbox deque for an agent."""
+        with self._lock:
+            return self._inboxes.setdefault(agent_id, deque(maxlen=INBOX_LIMIT))
+
+    def set_name(self, agent_id: str, name: str):
+        """Updates an agent's routing name (e.g. after it chooses one)."""
+        with self._lock:
+            self.agent_names[agent_id] = name
+
+    def _targets(self, content: str) -> list[str]:
+        lower = (content or "").lower()
+        with self._lock:
+            mentioned = [aid for aid, name in self.agent_names.items() if name and name.lower() in lower]
+            return mentioned or list(self._inboxes)
+
+    def _on_insert(self, record: dict):
+        if record.get("sender_id") != "user":
+            return
+        for agent_id in self._targets(record.get("content")):
+            self.inbox_for(agent_id).append(record)
+            if self.on_wake:
+                self.on_wake(agent_id)
+
+    def start(self) -> bool:
+        """Subscribes to chat inserts. Returns False if realtime is unavailable."""
+        return self._subscription.start()
+
+    def stop(self):
+        self._subscription.stop()
@@ -0,0 +1,186 @@
+"""
+Opening book and game-history position table for Soul Garden chess.
+
+Positions are keyed by FEN (EPD form: placement, side to move, castling and
+en passant, so transpositions share a key) in a small SQLite file under
+.cache/chess. Two sources feed it:
+
+  book     a seed of mainline openings, loaded on first use
+  history  every position reached in past sg_games.move_history, with the
+           points the mover went on to score from it
+
+A position found in the book, or one where a past move scored at least
+even, is played instantly with no engine search or LLM call.
+
+Usage:
+  python tools/chess_book.py build    # import finished games from sg_games
+  python tools/chess_book.py stats    # positions, lookups and hit rate
+"""
+import os
+import sys
+import random
+import sqlite3
+import threading
+import chess
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BOOK_PATH = os.path.join(ROOT_DIR, '.cache', 'chess', 'book.sqlite')
+
+SEED_WEIGHT = 4  # pseudo-games credited to each seeded book move
+MIN_HISTORY_GAMES = 2  # a history move needs this many games behind it to be trusted
+MIN_HISTORY_SCORE = 0.5  # ...and at least this average score for the mover
+
+SEED_LINES = [
+    "e4 e5 Nf3 Nc6 Bb5 a6 Ba4 Nf6 O-O Be7",       # Ruy Lopez
+    "e4 e5 Nf3 Nc6 Bc4 Bc5 c3 Nf6 d3 d6",         # Italian
+    "e4 c5 Nf3 d6 d4 cxd4 Nxd4 Nf6 Nc3 a6",       # Sicilian Najdorf
+    "e4 c5 Nf3 Nc6 d4 cxd4 Nxd4 Nf6 Nc3 e5",      # Sicilian Sveshnikov
+    "e4 e6 d4 d5 Nc3 Nf6 Bg5 Be7 e5 Nfd7",        # French
+    "e4 c6 d4 d5 Nc3 dxe4 Nxe4 Bf5 Ng3 Bg6",      # Caro-Kann
+    "d4 d5 c4 e6 Nc3 Nf6 Bg5 Be7 e3 O-O",         # Queen's Gambit Declined
+    "d4 d5 c4 c6 Nf3 Nf6 Nc3 dxc4 a4 Bf5",        # Slav
+    "d4 Nf6 c4 g6 Nc3 Bg7 e4 d6 Nf3 O-O",         # King's Indian
+    "d4 Nf6 c4 e6 Nc3 Bb4 e3 O-O Bd3 d5",         # Nimzo-Indian
+    "c4 e5 Nc3 Nf6 Nf3 Nc6 g3 d5 cxd5 Nxd5",      # English
+    "Nf3 d5 g3 Nf6 Bg2 e6 O-O Be7 d3 O-O",        # Reti
+]
+
+
+def position_key(board: chess.Board) -> str:
+    return board.epd()
+
+
+def _replay(moves_san: list[str]):
+    """Yields (board_before, move) for each legal SAN move; stops at the first bad one."""
+    board = chess.Board()
+    for san in moves_san:
+        try:
+            move = board.parse_san(san)
+        except ValueError:
+            return
+        yield board, move
+        board.push(move)
+
+
+class OpeningBook:
+    """Thread-safe FEN -> move table with lookup counters."""
+
+    def __init__(self, path: str = BOOK_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS positions (
+                key TEXT, move TEXT, source TEXT, games INTEGER, points REAL,
+                PRIMARY KEY (key, move, source)
+            );
+            CREATE TABLE IF NOT EXISTS imported_games (game_id TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER);
+        """)
+        if not self._db.execute("SELECT 1 FROM positions WHERE source = 'book' LIMIT 1").fetchone():
+            self._seed()
+        self._db.commit()
+
+    def _seed(self):
+        for line in SEED_LINES:
+            for board, move in _replay(line.split()):
+                self._add(position_key(board), move.uci(), "book", SEED_WEIGHT, SEED_WEIGHT * 0.5)
+
+    def _add(self, key: str, move: str, source: str, games: int, points: float):
+        # Caller holds self._lock (or is __init__)
+        self._db.execute(
+            "INSERT INTO positions VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (key, move, source) DO UPDATE SET games = games + excluded.games, points = points + excluded.points",
+            (key, move, source, games, points),
+        )
+
+    def _count(self, name: str):
+        # Caller holds self._lock
+        self._db.execute(
+            "INSERT INTO counters VALUES (?, 1) ON CONFLICT (name) DO UPDATE SET value = value + 1", (name,)
+        )
+
+    def lookup(self, board: chess.Board) -> tuple[chess.Move, str]:
+        """Returns (move, source) for a known position, or None."""
+        legal = {move.uci(): move for move in board.legal_moves}
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT move, source, games, points FROM positions WHERE key = ?", (position_key(board),)
+            ).fetchall()
+            book = [(m, g) for m, source, g, _ in rows if source == "book" and m in legal]
+            history = [(m, p) for m, source, g, p in rows
+                       if source == "history" and m in legal
+                       and g >= MIN_HISTORY_GAMES and p / g >= MIN_HISTORY_SCORE]
+            choice = None
+            for source, options in (("book", book), ("history", history)):
+                if options:
+                    moves, weights = zip(*options)
+                    choice = (legal[random.choices(moves, weights=weights)[0]], source)
+                    break
+            self._count(f"hits_{choice[1]}" if choice else "misses")
+            self._db.commit()
+        return choice
+
+    def record_game(self, game_id: str, move_history: list[str], winner: str,
+                    white_name: str, black_name: str) -> bool:
+        """Adds a finished game's positions to the history table. Returns False if already imported."""
+        with self._lock:
+            cur = self._db.execute("INSERT OR IGNORE INTO imported_games VALUES (?)", (str(game_id),))
+            if cur.rowcount == 0:
+                return False
+            for board, move in _replay(move_history or []):
+                mover = white_name if board.turn == chess.WHITE else black_name
+                if winner == "draw" or not winner:
+                    points = 0.5
+                else:
+                    points = 1.0 if winner == mover else 0.0
+                self._add(position_key(board), move.uci(), "history", 1, points)
+            self._db.commit()
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._db.execute("SELECT name, value FROM counters").fetchall())
+            sizes = dict(self._db.execute(
+                "SELECT source, COUNT(DISTINCT key) FROM positions GROUP BY source").fetchall())
+            games = self._db.execute("SELECT COUNT(*) FROM imported_games").fetchone()[0]
+        hits = counters.get("hits_book", 0) + counters.get("hits_history", 0)
+        lookups = hits + counters.get("misses", 0)
+        return {
+            "book_positions": sizes.get("book", 0),
+            "history_positions": sizes.get("history", 0),
+            "games_imported": games,
+            "lookups": lookups,
+            "hits_book": counters.get("hits_book", 0),
+            "hits_history": counters.get("hits_history", 0),
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def build_from_games(book: OpeningBook, client) -> int:
+    """Imports every finished chess game in sg_games (one query). Returns the number newly imported."""
+    resp = client.table("sg_games") \
+        .select("id, move_history, winner, player_white_name, player_black_name") \
+        .eq("game_type", "chess") \
+        .eq("status", "finished") \
+        .execute()
+    imported = 0
+    for game in resp.data or []:
+        if book.record_game(game["id"], game.get("move_history"), game.get("winner"),
+                            game.get("player_white_name"), game.get("player_black_name")):
+            imported += 1
+    return imported
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    book = OpeningBook()
+    if command == "build":
+        from agent_auth import get_anon_client
+        print(f"📚 Imported {build_from_games(book, get_anon_client())} finished game(s).")
+    elif command != "stats":
+        print("Usage: python chess_book.py [build|stats]")
+        sys.exit(1)
+    for name, value in book.stats().items():
+        print(f"  {name}: {value}")
@@ -0,0 +1,239 @@
+"""
+Small alpha-beta chess engine for Soul Garden agents, built on python-chess.
+
+Iterative-deepening negamax with alpha-beta pruning, a quiescence search
+over captures, MVV-LVA move ordering and an in-memory transposition table.
+Each search is bounded by a depth and a wall-clock budget, so move latency
+is predictable. top_moves() returns the best k root moves with scores; the
+agent's LLM only ever chooses among those.
+"""
+import os
+import time
+import chess
+import chess.polyglot
+
+DEFAULT_DEPTH = int(os.environ.get("CHESS_DEPTH", "3"))
+DEFAULT_TIME_BUDGET = float(os.environ.get("CHESS_TIME_BUDGET", "2.0"))  # seconds per move
+MATE_SCORE = 100_000
+MAX_QUIESCENCE_DEPTH = 6
+
+PIECE_VALUES = {
+    chess.PAWN: 100, chess.KNIGHT: 320, chess.BISHOP: 330,
+    chess.ROOK: 500, chess.QUEEN: 900, chess.KING: 0,
+}
+
+# Piece-square tables from White's point of view, a8..h8 first (mirrored for Black)
+_PST = {
+    chess.PAWN: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0,
+    ],
+    chess.KNIGHT: [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ],
+    chess.BISHOP: [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ],
+    chess.ROOK: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0,
+    ],
+    chess.QUEEN: [
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20,
+    ],
+    chess.KING: [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20,
+    ],
+}
+
+_EXACT, _LOWER, _UPPER = 0, 1, 2
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+def evaluate(board: chess.Board) -> int:
+    """Static evaluation in centipawns from the side to move's point of view."""
+    score = 0
+    for square, piece in board.piece_map().items():
+        # Tables are laid out rank 8 first; White reads them flipped, Black as-is
+        index = chess.square_mirror(square) if piece.color == chess.WHITE else square
+        value = PIECE_VALUES[piece.piece_type] + _PST[piece.piece_type][index]
+        score += value if piece.color == chess.WHITE else -value
+    return score if board.turn == chess.WHITE else -score
+
+
+class ChessEngine:
+    """Depth- and time-bounded alpha-beta search. Not thread-safe; use one per thread."""
+
+    def __init__(self, depth: int = DEFAULT_DEPTH, time_budget: float = DEFAULT_TIME_BUDGET):
+        self.depth = depth
+        self.time_budget = time_budget
+        self._table: dict[int, tuple[int, int, int, chess.Move]] = {}
+        self._deadline = 0.0
+        self.nodes = 0
+
+    def top_moves(self, board: chess.Board, k: int = 3) -> list[tuple[chess.Move, int]]:
+        """
+        Returns up to k (move, centipawn score) pairs, best first, from the deepest
+        iteration finished within the time budget. Scores are for the side to move.
+        """
+        moves = list(board.legal_moves)
+        if not moves:
+            return []
+
+        self._deadline = time.monotonic() + self.time_budget
+        self.nodes = 0
+        board = board.copy(stack=False)
+        scored = [(move, 0) for move in self._ordered(board, moves, None)]
+
+        for depth in range(1, self.depth + 1):
+            try:
+                scored = self._search_root(board, [move for move, _ in scored], depth)
+            except _OutOfTime:
+                break
+        return scored[:k]
+
+    def best_move(self, board: chess.Board) -> chess.Move:
+        top = self.top_moves(board, 1)
+        return top[0][0] if top else None
+
+    def _search_root(self, board: chess.Board, moves: list[chess.Move], depth: int) -> list[tuple[chess.Move, int]]:
+        # Every root move gets an exact score so the caller can rank candidates
+        scored = []
+        for move in moves:
+            board.push(move)
+            try:
+                score = -self._negamax(board, depth - 1, -MATE_SCORE - 1, MATE_SCORE + 1, 1)
+            finally:
+                board.pop()
+            scored.append((move, score))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored
+
+    def _negamax(self, board: chess.Board, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if self.nodes % 1024 == 0 and time.monotonic() > self._deadline:
+            raise _OutOfTime()
+
+        if board.is_checkmate():
+            return -MATE_SCORE + ply
+        if board.is_stalemate() or board.is_insufficient_material() or board.is_repetition(2):
+            return 0
+        if depth <= 0:
+            return self._quiescence(board, alpha, beta, 0)
+
+        key = chess.polyglot.zobrist_hash(board)
+        entry = self._table.get(key)
+        hash_move = None
+        if entry is not None:
+            entry_depth, flag, value, hash_move = entry
+            if entry_depth >= depth:
+                if flag == _EXACT:
+                    return value
+                if flag == _LOWER:
+                    alpha = max(alpha, value)
+                elif flag == _UPPER:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        original_alpha = alpha
+        best_value, best_move = -MATE_SCORE - 1, None
+        for move in self._ordered(board, board.legal_moves, hash_move):
+            board.push(move)
+            try:
+                value = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.pop()
+            if value > best_value:
+                best_value, best_move = value, move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            flag = _UPPER
+        elif best_value >= beta:
+            flag = _LOWER
+        else:
+            flag = _EXACT
+        self._table[key] = (depth, flag, best_value, best_move)
+        return best_value
+
+    def _quiescence(self, board: chess.Board, alpha: int, beta: int, qdepth: int) -> int:
+        # Only captures (and promotions) are searched, so evaluations are never taken mid-exchange
+        self.nodes += 1
+        stand_pat = evaluate(board)
+        if stand_pat >= beta or qdepth >= MAX_QUIESCENCE_DEPTH:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+
+        captures = [m for m in board.legal_moves if board.is_capture(m) or m.promotion]
+        for move in self._ordered(board, captures, None):
+            board.push(move)
+            try:
+                value = -self._quiescence(board, -beta, -alpha, qdepth + 1)
+            finally:
+                board.pop()
+            if value >= beta:
+                return value
+            alpha = max(alpha, value)
+        return alpha
+
+    def _ordered(self, board: chess.Board, moves, hash_move: chess.Move) -> list[chess.Move]:
+        """Hash move first, then captures by MVV-LVA, then promotions and checks."""
+        def priority(move: chess.Move) -> int:
+            if move == hash_move:
+                return 1_000_000
+            score = 0
+            if board.is_capture(move):
+                victim = board.piece_at(move.to_square)
+                victim_value = PIECE_VALUES[victim.piece_type] if victim else PIECE_VALUES[chess.PAWN]
+                attacker = board.piece_at(move.from_square)
+                score += 10 * victim_value - PIECE_VALUES[attacker.piece_type]
+            if move.promotion:
+                score += PIECE_VALUES[move.promotion]
+            return score
+        return sorted(moves, key=priority, reverse=True)
@@ -0,0 +1,158 @@
+"""
+Persistent content-hash -> vector cache for embeddings.
+
+Vectors are stored as raw float32 rows in one append-only file
+(`vectors.f32`) that is memory-mapped for reads; `index.json` maps
+sha256(model + text) to a row number. Identical text is never sent to the
+embeddings API twice, across runs and across scripts.
+
+Appends and index writes happen under an exclusive lock on `lock` (fcntl,
+so on POSIX only), which lets several processes share one cache directory.
+"""
+import os
+import json
+import mmap
+import array
+import hashlib
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CACHE_DIR = os.path.join(ROOT_DIR, '.cache', 'embeddings')
+FLOAT_BYTES = 4
+
+
+def embedding_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Append-only float32 vector store with a JSON index. Thread-safe."""
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.vectors_path = os.path.join(cache_dir, "vectors.f32")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.lock_path = os.path.join(cache_dir, "lock")
+        self._lock = threading.Lock()
+        self._index: dict[str, int] = {}
+        self.dim = None
+        self._mmap = None
+        self._mapped_rows = 0
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive cross-process lock over the vectors file and the index."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _read_index(self) -> tuple[int, dict[str, int]]:
+        """Returns (dim, keys) from index.json, keeping only rows that are fully on disk."""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            dim, keys = data["dim"], data["keys"]
+        except (OSError, ValueError, KeyError):
+            return None, {}
+        # Drop index entries whose rows never made it to disk (e.g. a crash mid-write)
+        rows_on_disk = os.path.getsize(self.vectors_path) // (dim * FLOAT_BYTES) if os.path.exists(self.vectors_path) else 0
+        return dim, {k: row for k, row in keys.items() if row < rows_on_disk}
+
+    def _load(self):
+        self.dim, self._index = self._read_index()
+
+    def _merge_disk_index(self):
+        # Caller holds both locks: picks up rows other processes have indexed since we loaded
+        dim, keys = self._read_index()
+        if self.dim is None:
+            self.dim = dim
+        if dim == self.dim:
+            for key, row in keys.items():
+                self._index.setdefault(key, row)
+
+    def _remap(self):
+        # Caller holds self._lock
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if os.path.exists(self.vectors_path) and os.path.getsize(self.vectors_path) > 0:
+            with open(self.vectors_path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_rows = len(self._mmap) // (self.dim * FLOAT_BYTES)
+        else:
+            self._mapped_rows = 0
+
+    def get(self, key: str) -> list[float]:
+        """Returns the cached vector for `key`, or None."""
+        with self._lock:
+            row = self._index.get(key)
+            if row is None:
+                self.misses += 1
+                return None
+            if row >= self._mapped_rows:
+                self._remap()
+            stride = self.dim * FLOAT_BYTES
+            vector = array.array("f")
+            vector.frombytes(self._mmap[row * stride:(row + 1) * stride])
+            self.hits += 1
+            return vector.tolist()
+
+    def put_many(self, items: list[tuple[str, list[float]]]):
+        """Appends vectors and indexes them. Call save() to persist the index."""
+        items = [(k, v) for k, v in items if v is not None]
+        if not items:
+            return
+        with self._lock, self._file_lock():
+            self._merge_disk_index()
+            if self.dim is None:
+                self.dim = len(items[0][1])
+            stride = self.dim * FLOAT_BYTES
+            with open(self.vectors_path, "ab") as f:
+                # A torn append (crash mid-write) would shift every later row: cut it off first
+                size = f.seek(0, os.SEEK_END)
+                if size % stride:
+                    f.truncate(size - size % stride)
+                    f.seek(0, os.SEEK_END)
+                for key, vector in items:
+                    if key in self._index or len(vector) != self.dim:
+                        continue
+                    self._index[key] = f.tell() // stride
+                    f.write(array.array("f", vector).tobytes())
+            self._dirty = True
+
+    def save(self):
+        """Persists the index (vectors are already on disk)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            with self._file_lock():
+                self._save_index()
+
+    def _save_index(self):
+        # Caller holds both locks
+        self._merge_disk_index()
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "keys": self._index}, f)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "vectors": len(self._index)}
@@ -0,0 +1,160 @@
+"""
+Soul Garden — Game Room
+=======================
+One service that plays chess for every agent in the process. Each round it
+fetches all waiting and active chess games with a single query, seats agents
+in waiting games, and plays every pending turn, with independent games
+running in parallel. Agents driven by the scheduler leave chess to the room,
+so their own ticks make no game queries at all.
+"""
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from supabase import Client
+from agent_auth import get_anon_client
+from agent_chess import get_authenticated_client, _next_game_state, _record_finished_game
+
+DEFAULT_INTERVAL = 15  # seconds between game-room rounds
+DEFAULT_PARALLEL = 4  # games played at the same time
+
+
+class GameRoom:
+    """Fetches every open chess game once per round and dispatches turns to the agents that own them."""
+
+    def __init__(self, agent_names: dict[str, str], interval: float = DEFAULT_INTERVAL,
+                 max_parallel: int = DEFAULT_PARALLEL, client: Client = None):
+        self.agent_names = dict(agent_names)
+        self.interval = interval
+        self.max_parallel = max(1, max_parallel)
+        self.client = client or get_anon_client()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="game-room")
+        self._stop = threading.Event()
+        self._thread = None
+        self._count_lock = threading.Lock()  # moves are counted from executor threads
+        self.rounds = 0
+        self.moves = 0
+        self.joins = 0
+
+    def set_name(self, agent_id: str, name: str):
+        """Keeps the room's name for an agent current (e.g. after it chooses one)."""
+        if agent_id in self.agent_names and name:
+            self.agent_names[agent_id] = name
+
+    def fetch_games(self) -> list[dict]:
+        """All waiting and active chess games, in one query."""
+        resp = self.client.table("sg_games") \
+            .select("*") \
+            .eq("game_type", "chess") \
+            .or_("status.eq.waiting,status.eq.active") \
+            .execute()
+        return resp.data or []
+
+    def plan(self, games: list[dict]) -> tuple[list, list]:
+        """
+        Splits games into (joins, turns), each a list of (game, agent_id).
+        An agent joins at most one waiting game per round, and agents with the
+        fewest games in progress are seated first. Performs no I/O.
+        """
+        busy = {agent_id: 0 for agent_id in self.agent_names}
+        turns = []
+        for game in games:
+            if game["status"] != "active":
+                continue
+            for seat in ("player_white", "player_black"):
+                if game.get(seat) in busy:
+                    busy[game[seat]] += 1
+            to_move = game["player_white"] if game["turn"] == "w" else game["player_black"]
+            if to_move in self.agent_names:
+                turns.append((game, to_move))
+
+        joins = []
+        seated = set()
+        for game in games:
+            if game["status"] != "waiting":
+                continue
+            candidates = [aid for aid in self.agent_names if aid != game.get("player_white") and aid not in seated]
+            if not candidates:
+                continue
+            random.shuffle(candidates)
+            agent_id = min(candidates, key=lambda aid: busy[aid])
+            seated.add(agent_id)
+            joins.append((game, agent_id))
+        return joins, turns
+
+    def run_round(self) -> int:
+        """Runs one round. Returns the number of joins + moves made."""
+        self.rounds += 1
+        try:
+            games = self.fetch_games()
+        except Exception as e:
+            print(f"[GameRoom] Could not read sg_games: {e}")
+            return 0
+
+        joins, turns = self.plan(games)
+        joined = sum(self._join(game, agent_id) for game, agent_id in joins)
+
+        # Each game is independent, so their turns are searched concurrently
+        results = list(self._executor.map(lambda item: self._play(*item), turns))
+        return joined + sum(results)
+
+    def _join(self, game: dict, agent_id: str) -> int:
+        name = self.agent_names[agent_id]
+        print(f"[{name}] Joining chess game {game['id']}...")
+        try:
+            # Only claim the seat if nobody else has taken it since the fetch
+            resp = get_authenticated_client(agent_id).table("sg_games").update({
+                "player_black": agent_id,
+                "player_black_name": name,
+                "status": "active",
+            }).eq("id", game["id"]).eq("status", "waiting").execute()
+        except Exception as e:
+            print(f"[GameRoom] Join failed for {name}: {e}")
+            return 0
+        if not resp.data:
+            print(f"[{name}] Game {game['id']} was taken before we sat down.")
+            return 0
+        self.joins += 1
+        return 1
+
+    def _play(self, game: dict, agent_id: str) -> int:
+        name = self.agent_names[agent_id]
+        try:
+            update = _next_game_state(name, game)
+            if update is None:
+                return 0
+            # Guard on the position we read so a stale snapshot can never move twice
+            resp = get_authenticated_client(agent_id).table("sg_games").update(update) \
+                .eq("id", game["id"]).eq("board_state", game["board_state"]).eq("status", "active").execute()
+        except Exception as e:
+            print(f"[GameRoom] Move failed for {name} in game {game['id']}: {e}")
+            return 0
+        if not resp.data:
+            print(f"[{name}] Game {game['id']} moved on before our move landed; skipping.")
+            return 0
+        try:
+            _record_finished_game(game, update)
+        except Exception as e:
+            print(f"[GameRoom] Could not add game {game['id']} to the opening book: {e}")
+        with self._count_lock:
+            self.moves += 1
+        return 1
+
+    # ── Lifecycle ─────────────────────────────────────────────────
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_round()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Runs rounds every `interval` seconds on a daemon thread."""
+        self._thread = threading.Thread(target=self._loop, name="game-room", daemon=True)
+        self._thread.start()
+        print(f"[GameRoom] Playing chess for {len(self.agent_names)} agents every {self.interval}s")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,69 @@
+"""
+Shared, TTL-bounded snapshot of the garden's public state.
+
+Every OpenClawAgent.observe() used to query sg_presence (self + everyone
+else) and the latest sg_events on its own, so N agents in one scheduling
+round issued ~3N near-identical reads. A GardenSnapshot is fetched once and
+served to every agent in the process until it expires; concurrent callers
+wait for a single in-flight refresh instead of each issuing their own.
+
+Agents write their own presence through to the snapshot after each tick, so
+later agents in the same round still see them where they moved.
+"""
+import time
+import threading
+from supabase import Client
+
+DEFAULT_TTL = 10.0  # seconds a snapshot is served before refetching
+EVENT_LIMIT = 5
+
+
+class GardenSnapshot:
+    """All presence rows + the latest events, shared across agents."""
+
+    def __init__(self, client: Client, ttl: float = DEFAULT_TTL, event_limit: int = EVENT_LIMIT):
+        self.client = client
+        self.ttl = ttl
+        self.event_limit = event_limit
+        self._lock = threading.Lock()
+        self._presence: dict[str, dict] = {}
+        self._events: list[dict] = []
+        self._fetched_at = 0.0
+        self.fetches = 0
+
+    @property
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._fetched_at >= self.ttl
+
+    def _refresh(self):
+        presence = self.client.table('sg_presence').select('*').execute()
+        events = self.client.table('sg_events').select('type, payload, created_at') \
+            .order('created_at', desc=True).limit(self.event_limit).execute()
+        self._presence = {row['agent_id']: row for row in presence.data or []}
+        self._events = events.data or []
+        self._fetched_at = time.monotonic()
+        self.fetches += 1
+
+    def _ensure_fresh(self):
+        # Single-flight: whoever holds the lock refreshes, everyone else reuses it
+        with self._lock:
+            if self.is_stale:
+                self._refresh()
+
+    def view(self, agent_id: str) -> tuple[dict, list[dict], list[dict]]:
+        """Returns (own presence or None, others' presence, recent events) for one agent."""
+        self._ensure_fresh()
+        with self._lock:
+            me = self._presence.get(agent_id)
+            others = [row for aid, row in self._presence.items() if aid != agent_id]
+            return (dict(me) if me else None), others, list(self._events)
+
+    def apply_presence(self, row: dict):
+        """Writes an agent's own presence change through to the cached copy."""
+        with self._lock:
+            current = self._presence.get(row['agent_id'], {})
+            self._presence[row['agent_id']] = {**current, **row}
+
+    def invalidate(self):
+        with self._lock:
+            self._fetched_at = 0.0
@@ -0,0 +1,95 @@
+"""
+Response cache for LLMClient.
+
+An LRU + TTL cache of chat completions keyed by
+(model, system prompt, user prompt, temperature, json_mode), with an
+optional SQLite file behind it so cached answers survive restarts.
+It is opt-in: enable it with `llm.enable_cache(...)` or LLM_CACHE=1
+(LLM_CACHE_PATH for the on-disk backend).
+"""
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL = 3600  # seconds
+
+
+def cache_key(model: str, system_prompt: str, user_prompt: str, temperature: float, json_mode: bool) -> str:
+    """Stable hash of everything that determines a completion request."""
+    raw = json.dumps([model, system_prompt, user_prompt, temperature, bool(json_mode)], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe LRU/TTL cache of completion text, optionally persisted to SQLite."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL, path: str = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, stored_at REAL, value TEXT)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_stored_at ON responses (stored_at)")
+            self._db.commit()
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def get(self, key: str) -> str:
+        """Returns the cached completion, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute("SELECT stored_at, value FROM responses WHERE key = ?", (key,)).fetchone()
+                if row:
+                    entry = (row[0], row[1])
+                    self._entries[key] = entry
+                    self._trim()
+            if entry is None or self._expired(entry[0]):
+                if entry is not None:
+                    self._evict(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            entry = (time.time(), value)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._trim()
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, *entry))
+                if self.ttl is not None:
+                    self._db.execute("DELETE FROM responses WHERE stored_at < ?", (time.time() - self.ttl,))
+                self._db.commit()
+
+    def _trim(self):
+        # Caller holds self._lock. LRU only bounds memory; the disk tier is bounded by the TTL
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _evict(self, key: str):
+        # Caller holds self._lock
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
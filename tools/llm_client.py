@@ -1,60 +1,417 @@
 import os
-from openai import OpenAI
+import time
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import httpx
+import openai
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
+from llm_cache import ResponseCache, cache_key, DEFAULT_MAX_ENTRIES, DEFAULT_TTL
+from embedding_cache import EmbeddingCache, embedding_key
+from llm_ratelimit import RateLimiter, MAX_RETRIES, EMBEDDING_RPM, EMBEDDING_TPM, backoff_delay, retry_after_seconds
+from prompt_budget import estimate_tokens
 
 # Ensure environment variables are loaded from the root .env
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
+# One pooled HTTP connection set for every agent in the process
+HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+EXPECTED_COMPLETION_TOKENS = 400  # reserved per chat call until real usage is known
+
+# Embeddings API limits are 2048 inputs / 300k tokens per request; stay well under both
+# (and under the embedding limiter's TPM, so one batch never puts it into debt)
+EMBEDDING_BATCH_SIZE = 256
+EMBEDDING_BATCH_TOKENS = 100_000
+EMBEDDING_CONCURRENCY = 4
+
+# Failures worth retrying: rate limits, timeouts, dropped connections and 5xx
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+
+
 class LLMClient:
     """
     A robust wrapper for the OpenAI API.
     Handles Chat Completions (Agent logic) and Embeddings (pgvector memory).
+    All calls share one pooled HTTP client, a requests/tokens-per-minute limiter
+    and jittered, Retry-After-aware retries. Failures still return None.
     """
     def __init__(self):
         self.api_key = os.environ.get("OPENAI_API_KEY")
         if not self.api_key:
             print("⚠️ WARNING: OPENAI_API_KEY is missing. LLMClient will fail.")
             
-        self.client = OpenAI(api_key=self.api_key)
+        # Retries are handled here (rate-limit aware), so the SDK's own are disabled
+        self.client = OpenAI(
+            api_key=self.api_key, max_retries=0,
+            http_client=httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT),
+        )
+        # Async twin for the asyncio agent path (agent_tick_async.py)
+        self.async_client = AsyncOpenAI(
+            api_key=self.api_key, max_retries=0,
+            http_client=httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT),
+        )
+
+        self.limiter = RateLimiter()
+        # Embeddings have their own quota per model, so they never stall chat (see embedding_limiter)
+        self._embedding_limiters: dict[str, RateLimiter] = {}
+        self._embedding_limiters_lock = threading.Lock()
+        self._metrics = {"requests": 0, "retries": 0, "rate_limited": 0, "failures": 0, "tokens": 0}
+        self._metrics_lock = threading.Lock()
         
         # The user uses Codex 5,3 subscription, which gives access to standard models
         self.default_chat_model = "gpt-4o" 
         self.default_embedding_model = "text-embedding-3-small"
 
+        # Opt-in response cache + in-flight request coalescing (see enable_cache)
+        self.cache: ResponseCache = None
+        self._inflight: dict[str, Future] = {}
+        self._ainflight: dict[str, asyncio.Future] = {}
+        self._inflight_lock = threading.Lock()
+        self.coalesced = 0
+        self._embedding_cache: EmbeddingCache = None
+        self._embedding_cache_lock = threading.Lock()
+        if os.environ.get("LLM_CACHE") == "1":
+            self.enable_cache(path=os.environ.get("LLM_CACHE_PATH"))
+
+    def enable_cache(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL, path: str = None):
+        """
+        Turns on the chat response cache. Identical requests (same model, prompts,
+        temperature and json_mode) are answered from the cache, and identical
+        requests already in flight share a single API call.
+        """
+        self.cache = ResponseCache(max_entries=max_entries, ttl=ttl, path=path)
+
+    def cache_stats(self) -> dict:
+        """Hit/miss/coalesced counters for the response cache."""
+        stats = self.cache.stats() if self.cache else {"hits": 0, "misses": 0, "entries": 0}
+        return {**stats, "coalesced": self.coalesced, "enabled": self.cache is not None}
+
+    def metrics(self) -> dict:
+        """Transport counters: requests, retries, 429s, failures, tokens used and time spent throttled."""
+        with self._metrics_lock:
+            throttled = self.limiter.throttled_seconds + sum(
+                limiter.throttled_seconds for limiter in self._embedding_limiters.values())
+            return {**self._metrics, "throttled_seconds": round(throttled, 2)}
+
+    def _count(self, **deltas):
+        with self._metrics_lock:
+            for key, delta in deltas.items():
+                self._metrics[key] += delta
+
+    # ── Transport: rate limiting + retries ────────────────────────
+
+    def embedding_limiter(self, model: str) -> RateLimiter:
+        with self._embedding_limiters_lock:
+            if model not in self._embedding_limiters:
+                self._embedding_limiters[model] = RateLimiter.for_model(model, EMBEDDING_RPM, EMBEDDING_TPM)
+            return self._embedding_limiters[model]
+
+    def _on_error(self, e: Exception, attempt: int, label: str, estimated_tokens: int,
+                  limiter: RateLimiter = None) -> float:
+        """Returns seconds to wait before retrying, or None if the error is final."""
+        limiter = limiter or self.limiter
+        # The attempt used no tokens; hand back its reservation so retries don't drain the bucket
+        limiter.settle(estimated_tokens, 0)
+        if not isinstance(e, RETRYABLE_ERRORS) or attempt >= MAX_RETRIES:
+            self._count(failures=1)
+            print(f"❌ {label} Error: {e}")
+            return None
+        headers = getattr(getattr(e, "response", None), "headers", None)
+        if isinstance(e, openai.RateLimitError):
+            self._count(rate_limited=1)
+            limiter.observe(headers)
+        self._count(retries=1)
+        delay = backoff_delay(attempt, retry_after_seconds(headers))
+        print(f"⚠️ {label} retry {attempt + 1}/{MAX_RETRIES} in {delay:.1f}s: {e}")
+        return delay
+
+    def _call(self, create, kwargs: dict, estimated_tokens: int, label: str, limiter: RateLimiter = None):
+        """
+        Calls `create` (an SDK with_raw_response method) with limiter + retries. Returns the parsed response or None.
+        `limiter` defaults to the chat limiter.
+        """
+        limiter = limiter or self.limiter
+        for attempt in range(MAX_RETRIES + 1):
+            time.sleep(limiter.reserve(estimated_tokens))
+            try:
+                raw = create(**kwargs)
+            except Exception as e:
+                delay = self._on_error(e, attempt, label, estimated_tokens, limiter)
+                if delay is None:
+                    return None
+                time.sleep(delay)
+                continue
+            return self._on_success(raw, estimated_tokens, limiter)
+        return None
+
+    async def _acall(self, create, kwargs: dict, estimated_tokens: int, label: str, limiter: RateLimiter = None):
+        """Async variant of _call."""
+        limiter = limiter or self.limiter
+        for attempt in range(MAX_RETRIES + 1):
+            await asyncio.sleep(limiter.reserve(estimated_tokens))
+            try:
+                raw = await create(**kwargs)
+            except Exception as e:
+                delay = self._on_error(e, attempt, label, estimated_tokens, limiter)
+                if delay is None:
+                    return None
+                await asyncio.sleep(delay)
+                continue
+            return self._on_success(raw, estimated_tokens, limiter)
+        return None
+
+    def _on_success(self, raw, estimated_tokens: int, limiter: RateLimiter = None):
+        limiter = limiter or self.limiter
+        limiter.observe(raw.headers)
+        response = raw.parse()
+        usage = getattr(response, "usage", None)
+        actual = getattr(usage, "total_tokens", None) or estimated_tokens
+        limiter.settle(estimated_tokens, actual)
+        self._count(requests=1, tokens=actual)
+        return response
+
+    def _estimate_chat_tokens(self, kwargs: dict) -> int:
+        return sum(estimate_tokens(m["content"]) for m in kwargs["messages"]) + EXPECTED_COMPLETION_TOKENS
+
+    def _chat_kwargs(self, system_prompt: str, user_prompt: str, temperature: float, json_mode: bool) -> dict:
+        """Builds the Chat Completions request body shared by the sync and async paths."""
+        kwargs = {
+            "model": self.default_chat_model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": temperature
+        }
+
+        if json_mode:
+            kwargs["response_format"] = {"type": "json_object"}
+        return kwargs
+
     def generate_chat(self, system_prompt: str, user_prompt: str, temperature: float = 0.7, json_mode: bool = False) -> str:
-        """Generates a standard chat completion."""
+        """Generates a standard chat completion (served from the cache when enabled)."""
+        kwargs = self._chat_kwargs(system_prompt, user_prompt, temperature, json_mode)
+        if self.cache is None:
+            return self._create_chat(kwargs)
+
+        key = cache_key(kwargs["model"], system_prompt, user_prompt, temperature, json_mode)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        with self._inflight_lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                owner = True
+                pending = self._inflight[key] = Future()
+            else:
+                owner = False
+                self.coalesced += 1
+        if not owner:
+            return pending.result()
+
+        result = None
         try:
-            kwargs = {
-                "model": self.default_chat_model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "temperature": temperature
-            }
-            
-            if json_mode:
-                kwargs["response_format"] = {"type": "json_object"}
-                
-            response = self.client.chat.completions.create(**kwargs)
-            return response.choices[0].message.content
-            
+            result = self._create_chat(kwargs)
+            if result is not None:
+                self.cache.set(key, result)
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            pending.set_result(result)
+        return result
+
+    def _create_chat(self, kwargs: dict) -> str:
+        response = self._call(self.client.chat.completions.with_raw_response.create,
+                              kwargs, self._estimate_chat_tokens(kwargs), "LLM Chat")
+        return response.choices[0].message.content if response else None
+
+    async def agenerate_chat(self, system_prompt: str, user_prompt: str, temperature: float = 0.7, json_mode: bool = False) -> str:
+        """Async variant of generate_chat for use inside an event loop."""
+        kwargs = self._chat_kwargs(system_prompt, user_prompt, temperature, json_mode)
+        if self.cache is None:
+            return await self._acreate_chat(kwargs)
+
+        key = cache_key(kwargs["model"], system_prompt, user_prompt, temperature, json_mode)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        # Coalesce within this event loop (the agent runtime uses a single loop)
+        pending = self._ainflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        pending = self._ainflight[key] = asyncio.get_running_loop().create_future()
+        result = None
+        try:
+            result = await self._acreate_chat(kwargs)
+            if result is not None:
+                self.cache.set(key, result)
+        finally:
+            self._ainflight.pop(key, None)
+            pending.set_result(result)
+        return result
+
+    async def _acreate_chat(self, kwargs: dict) -> str:
+        response = await self._acall(self.async_client.chat.completions.with_raw_response.create,
+                                     kwargs, self._estimate_chat_tokens(kwargs), "LLM Chat")
+        return response.choices[0].message.content if response else None
+
+    def _open_stream(self, kwargs: dict, estimated: int):
+        """Opens a streaming completion. Retries only happen before the first token."""
+        for attempt in range(MAX_RETRIES + 1):
+            time.sleep(self.limiter.reserve(estimated))
+            try:
+                return self.client.chat.completions.create(**kwargs)
+            except Exception as e:
+                delay = self._on_error(e, attempt, "LLM Stream", estimated)
+                if delay is None:
+                    return None
+                time.sleep(delay)
+        return None
+
+    def _stream_kwargs(self, system_prompt: str, user_prompt: str, temperature: float) -> dict:
+        # include_usage adds a final chunk (with no choices) carrying the request's token usage
+        return {**self._chat_kwargs(system_prompt, user_prompt, temperature, False),
+                "stream": True, "stream_options": {"include_usage": True}}
+
+    def _on_stream_end(self, estimated_tokens: int, usage, produced: list[str]):
+        """Settles a stream's reservation with its reported usage, or a count of what it produced."""
+        actual = getattr(usage, "total_tokens", None) or \
+            estimated_tokens - EXPECTED_COMPLETION_TOKENS + estimate_tokens("".join(produced))
+        self.limiter.settle(estimated_tokens, actual)
+        self._count(requests=1, tokens=actual)
+
+    def stream_chat(self, system_prompt: str, user_prompt: str, temperature: float = 0.7):
+        """
+        Streams a chat completion, yielding text fragments as they arrive.
+        Yields nothing if the request fails; a stream cut off midway just ends early.
+        """
+        kwargs = self._stream_kwargs(system_prompt, user_prompt, temperature)
+        estimated = self._estimate_chat_tokens(kwargs)
+        stream = self._open_stream(kwargs, estimated)
+        if stream is None:
+            return
+        usage, produced = None, []
+        try:
+            for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    produced.append(chunk.choices[0].delta.content)
+                    yield produced[-1]
         except Exception as e:
-            print(f"❌ LLM Chat Error: {e}")
-            return None
+            self._count(failures=1)
+            print(f"❌ LLM Stream Error: {e}")
+        finally:
+            # Hands the connection back to the shared pool even if the consumer stopped early
+            stream.close()
+            self._on_stream_end(estimated, usage, produced)
 
-    def generate_embedding(self, text: str) -> list[float]:
-        """Generates a 1536-dimensional vector embedding for pgvector storage."""
+    async def astream_chat(self, system_prompt: str, user_prompt: str, temperature: float = 0.7):
+        """Async-iterator variant of stream_chat."""
+        kwargs = self._stream_kwargs(system_prompt, user_prompt, temperature)
+        estimated = self._estimate_chat_tokens(kwargs)
+        stream = None
+        for attempt in range(MAX_RETRIES + 1):
+            await asyncio.sleep(self.limiter.reserve(estimated))
+            try:
+                stream = await self.async_client.chat.completions.create(**kwargs)
+                break
+            except Exception as e:
+                delay = self._on_error(e, attempt, "LLM Stream", estimated)
+                if delay is None:
+                    return
+                await asyncio.sleep(delay)
+        if stream is None:
+            return
+        usage, produced = None, []
         try:
-            response = self.client.embeddings.create(
-                model=self.default_embedding_model,
-                input=text
-            )
-            return response.data[0].embedding
-            
+            async for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    produced.append(chunk.choices[0].delta.content)
+                    yield produced[-1]
         except Exception as e:
-            print(f"❌ LLM Embedding Error: {e}")
+            self._count(failures=1)
+            print(f"❌ LLM Stream Error: {e}")
+        finally:
+            await stream.close()
+            self._on_stream_end(estimated, usage, produced)
+
+    @property
+    def embedding_cache(self) -> EmbeddingCache:
+        """On-disk content-hash -> vector cache, opened on first use."""
+        with self._embedding_cache_lock:
+            if self._embedding_cache is None:
+                self._embedding_cache = EmbeddingCache()
+            return self._embedding_cache
+
+    def generate_embedding(self, text: str) -> list[float]:
+        """Generates a 1536-dimensional vector embedding for pgvector storage."""
+        return self.generate_embeddings([text])[0]
+
+    def generate_embeddings(self, texts: list[str], batch_size: int = EMBEDDING_BATCH_SIZE,
+                            max_concurrency: int = EMBEDDING_CONCURRENCY) -> list[list[float]]:
+        """
+        Embeds many strings at once. Text already in the embedding cache is not sent;
+        the rest is deduplicated, split into API-sized batches and embedded concurrently.
+        Returns one vector per input, in order (None where a batch failed).
+        """
+        model = self.default_embedding_model
+        cache = self.embedding_cache
+        keys = [embedding_key(model, text) for text in texts]
+        vectors: dict[str, list[float]] = {}
+        missing: dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in vectors or key in missing:
+                continue
+            cached = cache.get(key)
+            if cached is not None:
+                vectors[key] = cached
+            else:
+                missing[key] = text
+
+        batches = self._embedding_batches(list(missing.items()), batch_size)
+        if batches:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(batches)))) as pool:
+                for batch, embedded in zip(batches, pool.map(self._embed_batch, batches)):
+                    if embedded is None:
+                        continue
+                    pairs = list(zip((key for key, _ in batch), embedded))
+                    vectors.update(pairs)
+                    cache.put_many(pairs)
+            cache.save()
+        return [vectors.get(key) for key in keys]
+
+    def _embedding_batches(self, items: list[tuple[str, str]], batch_size: int) -> list[list[tuple[str, str]]]:
+        max_tokens = min(EMBEDDING_BATCH_TOKENS, self.embedding_limiter(self.default_embedding_model).token_capacity)
+        batches, current, current_tokens = [], [], 0
+        for key, text in items:
+            tokens = estimate_tokens(text)
+            if current and (len(current) >= batch_size or current_tokens + tokens > max_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append((key, text))
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _embed_batch(self, batch: list[tuple[str, str]]) -> list[list[float]]:
+        inputs = [text for _, text in batch]
+        model = self.default_embedding_model
+        response = self._call(self.client.embeddings.with_raw_response.create,
+                              {"model": model, "input": inputs},
+                              sum(estimate_tokens(text) for text in inputs), "LLM Embedding",
+                              self.embedding_limiter(model))
+        if response is None:
             return None
+        ordered = sorted(response.data, key=lambda item: item.index)
+        return [item.embedding for item in ordered]
 
 # Singleton export
 llm = LLMClient()
@@ -0,0 +1,123 @@
+"""
+Client-side rate limiting and retry policy for LLMClient.
+
+RateLimiter is a pair of token buckets (requests/min and tokens/min) shared
+by every call in the process, so a burst of agent ticks queues up locally
+instead of tripping OpenAI 429s. Buckets are clamped to the
+x-ratelimit-remaining-* headers OpenAI returns, so the limiter tracks the
+real quota even when other processes share the key. Chat and embeddings
+have separate OpenAI quotas, so each embedding model gets a limiter of its
+own (see RateLimiter.for_model).
+
+backoff_delay() implements jittered exponential backoff that honours the
+server's Retry-After when one is given.
+"""
+import os
+import time
+import random
+import threading
+
+DEFAULT_RPM = int(os.environ.get("OPENAI_RPM", "500"))
+DEFAULT_TPM = int(os.environ.get("OPENAI_TPM", "30000"))
+# Embedding defaults; OPENAI_RPM_<MODEL> / OPENAI_TPM_<MODEL> override them per model
+EMBEDDING_RPM = int(os.environ.get("OPENAI_EMBEDDING_RPM", "3000"))
+EMBEDDING_TPM = int(os.environ.get("OPENAI_EMBEDDING_TPM", "1000000"))
+
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0  # seconds
+BACKOFF_CAP = 30.0  # seconds
+
+
+class _Bucket:
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Takes `amount` (possibly going into debt) and returns seconds until it is covered."""
+        self._refill(now)
+        self.level -= amount
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def clamp(self, remaining: float, now: float):
+        self._refill(now)
+        self.level = min(self.level, remaining)
+
+
+class RateLimiter:
+    """Requests/min + tokens/min token buckets. Thread-safe; usable from sync and async code."""
+
+    def __init__(self, rpm: int = DEFAULT_RPM, tpm: int = DEFAULT_TPM):
+        self._requests = _Bucket(rpm)
+        self._tokens = _Bucket(tpm)
+        self._lock = threading.Lock()
+        self.throttled_seconds = 0.0
+
+    @classmethod
+    def for_model(cls, model: str, rpm: int, tpm: int) -> "RateLimiter":
+        """A limiter for `model`, honouring OPENAI_RPM_<MODEL> / OPENAI_TPM_<MODEL> (e.g. OPENAI_TPM_TEXT_EMBEDDING_3_SMALL)."""
+        suffix = model.upper().replace("-", "_").replace(".", "_")
+        return cls(int(os.environ.get(f"OPENAI_RPM_{suffix}", rpm)), int(os.environ.get(f"OPENAI_TPM_{suffix}", tpm)))
+
+    @property
+    def token_capacity(self) -> int:
+        """Tokens a single request can reserve without going into debt."""
+        return int(self._tokens.capacity)
+
+    def reserve(self, tokens: int) -> float:
+        """Reserves one request and `tokens` tokens. Returns how long the caller must wait first."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self._requests.reserve(1, now), self._tokens.reserve(tokens, now))
+            self.throttled_seconds += wait
+            return wait
+
+    def settle(self, estimated: int, actual: int):
+        """Corrects a reservation once the real token usage is known."""
+        with self._lock:
+            self._tokens.level += estimated - actual
+
+    def observe(self, headers):
+        """Clamps the buckets to the quota OpenAI reports in its response headers."""
+        if headers is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            remaining_requests = headers.get("x-ratelimit-remaining-requests")
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            if remaining_requests is not None:
+                self._requests.clamp(float(remaining_requests), now)
+            if remaining_tokens is not None:
+                self._tokens.clamp(float(remaining_tokens), now)
+
+
+def retry_after_seconds(headers) -> float:
+    """Reads Retry-After (or OpenAI's retry-after-ms) from response headers, if present."""
+    if headers is None:
+        return None
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is not None:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def backoff_delay(attempt: int, retry_after: float = None) -> float:
+    """Seconds to wait before retry number `attempt` (0-based): Retry-After, else full-jitter backoff."""
+    if retry_after is not None:
+        return min(BACKOFF_CAP, retry_after) + random.uniform(0, 0.25)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
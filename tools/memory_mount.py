@@ -0,0 +1,216 @@
+"""
+Cached, incremental mounting of an agent's local markdown memory.
+
+OpenClawAgent._mount_local_files used to re-read MISSION.md, every core file
+and every memory/diary entry under `Legacy Files/<name>_migration` and
+re-join them on every construction. LocalMemoryMount keeps a per-agent cache
+on disk (`.cache/local_memory/<name>.json`) keyed by each file's
+path + mtime + size:
+
+  - unchanged files are never re-opened;
+  - if nothing changed at all, the previously joined blob is reused as-is;
+  - refresh() re-stats the tree and, when the only change is new entries at
+    the end (the usual case for a diary), appends just those.
+
+The cache is a local derivative of files in the repo, not garden state —
+Supabase remains the source of truth for everything the garden shares.
+"""
+import os
+import json
+import glob
+import hashlib
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+LEGACY_DIR = os.path.join(ROOT_DIR, 'Legacy Files')
+MISSION_PATH = os.path.join(ROOT_DIR, 'docs', 'MISSION.md')
+CACHE_DIR = os.path.join(ROOT_DIR, '.cache', 'local_memory')
+
+CORE_FILES = ['IDENTITY.md', 'SOUL.md', 'LORE.md', 'MEMORY.md', 'AGENTS.md', 'DRIFT_LOG.md']
+LOG_DIRS = ['memory', 'diary']
+CACHE_VERSION = 1
+
+
+def _stat_key(path: str) -> list:
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+class LocalMemoryMount:
+    """
+    The mounted markdown memory of one agent.
+
+    `text` is the joined blob (same layout _mount_local_files always produced),
+    `sections` the individual files as {"name", "kind", "path", "text"} where
+    kind is one of mission/core/memory/diary.
+    """
+    def __init__(self, name: str, cache_dir: str = CACHE_DIR):
+        self.name = name
+        self.agent_dir = os.path.join(LEGACY_DIR, f"{name.lower()}_migration")
+        self.cache_path = os.path.join(cache_dir, f"{name.lower()}.json")
+        self.text = ""
+        self.sections: list[dict] = []
+        self._files: dict[str, dict] = {}  # rel path -> {"stat", "sha256", "text"}
+        self._order: list[str] = []
+        self._fingerprint = None
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.agent_dir)
+
+    # ── Discovery ─────────────────────────────────────────────────
+
+    def _discover(self) -> list[tuple[str, str, str]]:
+        """Returns (kind, label, abs path) for every file that belongs in the mount, in order."""
+        found = []
+        if os.path.exists(MISSION_PATH):
+            found.append(("mission", "MISSION.md", MISSION_PATH))
+        for filename in CORE_FILES:
+            filepath = os.path.join(self.agent_dir, filename)
+            if os.path.exists(filepath):
+                found.append(("core", filename, filepath))
+        for sub_dir in LOG_DIRS:
+            target_path = os.path.join(self.agent_dir, sub_dir)
+            if os.path.exists(target_path):
+                for filepath in sorted(glob.glob(os.path.join(target_path, '**/*.md'), recursive=True)):
+                    found.append((sub_dir, os.path.basename(filepath), filepath))
+        return found
+
+    # ── Cache persistence ─────────────────────────────────────────
+
+    def _load_cache(self) -> dict:
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get("version") == CACHE_VERSION:
+                return cache
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": CACHE_VERSION,
+                "fingerprint": self._fingerprint,
+                "order": self._order,
+                "files": self._files,
+                "text": self.text,
+            }, f)
+        os.replace(tmp_path, self.cache_path)
+
+    # ── Mounting ──────────────────────────────────────────────────
+
+    def _scan(self, known: dict) -> tuple[list, dict, int]:
+        """Stats every file, reusing `known` entries whose path+mtime+size match. Returns (found, files, reads)."""
+        found = self._discover()
+        files, reads = {}, 0
+        for _, _, path in found:
+            rel = os.path.relpath(path, ROOT_DIR)
+            stat = _stat_key(path)
+            entry = known.get(rel)
+            if not entry or entry["stat"] != stat:
+                with open(path, 'r', encoding='utf-8') as f:
+                    text = f.read()
+                entry = {"stat": stat, "sha256": hashlib.sha256(text.encode('utf-8')).hexdigest(), "text": text}
+                reads += 1
+            files[rel] = entry
+        return found, files, reads
+
+    def _fingerprint_of(self, found: list, files: dict) -> str:
+        h = hashlib.sha256()
+        for _, _, path in found:
+            rel = os.path.relpath(path, ROOT_DIR)
+            h.update(f"{rel}\0{files[rel]['stat']}\0".encode('utf-8'))
+        return h.hexdigest()
+
+    def _block(self, label: str, rel: str) -> str:
+        return f"--- {label} ---\n{self._files[rel]['text']}\n\n"
+
+    def _join(self, found: list) -> str:
+        """Builds the blob in the layout the agent prompts expect."""
+        if not self.exists:
+            return ""
+        upper = self.name.upper()
+        parts = ["=== SOUL GARDEN DIRECTIVES ===\n\n"]
+        core_header = f"=== {upper}'S CORE ARCHITECTURE ===\n\n"
+        log_header = f"=== {upper}'S PAST MEMORIES & DIARY ===\n\n"
+        emitted_core = emitted_log = False
+        for kind, label, path in found:
+            if kind in LOG_DIRS and not emitted_log:
+                if not emitted_core:
+                    parts.append(core_header)
+                    emitted_core = True
+                parts.append(log_header)
+                emitted_log = True
+            elif kind == "core" and not emitted_core:
+                parts.append(core_header)
+                emitted_core = True
+            parts.append(self._block(label, os.path.relpath(path, ROOT_DIR)))
+        if not emitted_core:
+            parts.append(core_header)
+        if not emitted_log:
+            parts.append(log_header)
+        return "".join(parts)
+
+    def _set_sections(self, found: list):
+        self.sections = [
+            {"name": label, "kind": kind, "path": path,
+             "text": self._files[os.path.relpath(path, ROOT_DIR)]["text"]}
+            for kind, label, path in found
+        ]
+
+    def load(self) -> str:
+        """Mounts the agent's files, reading only what changed since the cached copy."""
+        cache = self._load_cache()
+        found, self._files, reads = self._scan(cache.get("files", {}))
+        self._order = [os.path.relpath(p, ROOT_DIR) for _, _, p in found]
+        fingerprint = self._fingerprint_of(found, self._files)
+
+        if cache.get("fingerprint") == fingerprint and "text" in cache:
+            # Nothing changed on disk: reuse the joined blob untouched
+            self.text = cache["text"]
+        else:
+            self.text = self._join(found)
+        self._set_sections(found)
+
+        self._fingerprint = fingerprint
+        if cache.get("fingerprint") != fingerprint:
+            self._save_cache()
+        print(f"[{self.name}] Memory cache: {len(found)} files, {reads} read from disk.")
+        return self.text
+
+    def refresh(self) -> list[dict]:
+        """
+        Picks up new or changed files since the last load/refresh.
+        Returns the sections that are new or changed (empty if nothing moved).
+        """
+        previous_order = self._order
+        previous = self._files
+        found, files, reads = self._scan(previous)
+        fingerprint = self._fingerprint_of(found, files)
+        if fingerprint == self._fingerprint:
+            return []
+
+        order = [os.path.relpath(p, ROOT_DIR) for _, _, p in found]
+        changed = [rel for rel in order if previous.get(rel) is not files[rel]]
+        self._files, self._order, self._fingerprint = files, order, fingerprint
+
+        appended_only = (
+            self.text
+            and order[:len(previous_order)] == previous_order
+            and all(rel not in previous for rel in changed)
+            and all(kind in LOG_DIRS for kind, _, p in found[len(previous_order):])
+        )
+        if appended_only:
+            # New diary/memory entries at the tail: append just those blocks
+            self.text += "".join(self._block(label, os.path.relpath(p, ROOT_DIR))
+                                 for _, label, p in found[len(previous_order):])
+        else:
+            self.text = self._join(found)
+        self._set_sections(found)
+        self._save_cache()
+
+        print(f"[{self.name}] Memory refresh: {len(changed)} new/changed files, {reads} read from disk.")
+        return [s for s in self.sections if os.path.relpath(s["path"], ROOT_DIR) in changed]
@@ -0,0 +1,117 @@
+"""
+Compact observation encoding for agent prompts.
+
+observe() returns raw Supabase rows: full sg_presence rows for every other
+agent, event timestamps and the whole navmesh. Pasted with
+json.dumps(indent=2), that is thousands of mostly-whitespace tokens per tick.
+ObservationEncoder turns it into a minified, prompt-sized view:
+
+  - no indentation, and only the columns the prompts use;
+  - nearby agents listed (closest first), distant ones summarized as a count
+    plus an action histogram;
+  - navmesh bounds, obstacles and waypoints always included (the model needs
+    them to pick a valid move every tick), in a compact form that is only
+    rebuilt when the navmesh changes;
+  - every encode reports its token size.
+"""
+import json
+import math
+import hashlib
+from collections import Counter
+from prompt_budget import estimate_tokens
+
+NEAR_RADIUS = 25.0  # garden units; agents further away are summarized
+MAX_NEAR_AGENTS = 8
+EVENT_PAYLOAD_CHARS = 60
+
+
+def _position(row: dict) -> dict:
+    pos = (row or {}).get("position") or {}
+    return {axis: round(float(pos.get(axis, 0) or 0), 1) for axis in ("x", "y", "z")}
+
+
+def _distance(a: dict, b: dict) -> float:
+    return math.hypot(a["x"] - b["x"], a["z"] - b["z"])
+
+
+def _compact_obstacle(obstacle: dict) -> dict:
+    center = obstacle.get("center") or {}
+    compact = {"id": obstacle.get("id"), "at": [center.get("x"), center.get("z")]}
+    if obstacle.get("type") == "circle":
+        compact["r"] = obstacle.get("radius")
+    else:
+        compact["size"] = [obstacle.get("width"), obstacle.get("depth")]
+    return compact
+
+
+def _compact_waypoint(waypoint: dict) -> dict:
+    pos = waypoint.get("position") or {}
+    return {"id": waypoint.get("id"), "pos": [pos.get("x"), pos.get("z")], "tags": waypoint.get("tags")}
+
+
+def _compact_payload(payload) -> object:
+    if isinstance(payload, dict):
+        return {k: (v[:EVENT_PAYLOAD_CHARS] if isinstance(v, str) else v) for k, v in payload.items()}
+    return payload
+
+
+class ObservationEncoder:
+    """
+    Encodes observe() output for one agent. The compact navmesh block is
+    cached and only rebuilt when the navmesh changes.
+    """
+    def __init__(self):
+        self._navmesh_sig = None
+        self._navmesh_block: dict = {}
+        self.last_tokens = 0
+
+    def encode(self, context: dict, channel: str = "think") -> tuple[str, int]:
+        """Returns (compact JSON string, token count)."""
+        me = context.get("my_presence") or {}
+        my_pos = _position(me)
+
+        others = []
+        for row in context.get("others_presence") or []:
+            pos = _position(row)
+            others.append((_distance(my_pos, pos), row, pos))
+        others.sort(key=lambda item: item[0])
+
+        near = [
+            {"id": str(row.get("agent_id", ""))[:8], "pos": [pos["x"], pos["z"]],
+             "action": row.get("current_action"), "dist": round(dist, 1)}
+            for dist, row, pos in others
+            if dist <= NEAR_RADIUS
+        ][:MAX_NEAR_AGENTS]
+        distant = others[len(near):]
+
+        observation = {
+            "me": {"pos": my_pos, "action": me.get("current_action")},
+            "nearby": near,
+            "events": [
+                {"type": e.get("type"), "payload": _compact_payload(e.get("payload"))}
+                for e in context.get("recent_events") or []
+            ],
+        }
+        if distant:
+            observation["distant"] = {
+                "count": len(distant),
+                "actions": dict(Counter(row.get("current_action") for _, row, _ in distant).most_common(5)),
+            }
+
+        observation.update(self._navmesh(context.get("navmesh") or {}))
+
+        text = json.dumps(observation, separators=(",", ":"), ensure_ascii=False)
+        self.last_tokens = estimate_tokens(text)
+        return text, self.last_tokens
+
+    def _navmesh(self, navmesh: dict) -> dict:
+        sig = hashlib.sha1(json.dumps(navmesh, sort_keys=True).encode("utf-8")).hexdigest()
+        if self._navmesh_sig != sig:
+            bounds = navmesh.get("bounds") or {}
+            self._navmesh_sig = sig
+            self._navmesh_block = {
+                "bounds": [bounds.get("x_min"), bounds.get("x_max"), bounds.get("z_min"), bounds.get("z_max")],
+                "obstacles": [_compact_obstacle(o) for o in navmesh.get("obstacles", [])],
+                "waypoints": [_compact_waypoint(w) for w in navmesh.get("waypoints", [])],
+            }
+        return self._navmesh_block
@@ -0,0 +1,134 @@
+"""
+Token-budgeted prompt assembly for agent replies.
+
+Instead of pasting an agent's whole local memory into every prompt, the
+mounted sections (see memory_mount.py) are ranked by BM25 relevance to the
+incoming message and packed into a fixed token budget. IDENTITY.md and
+SOUL.md are always kept; the least relevant sections are truncated or
+dropped, and the caller gets a report of what was left out.
+
+Token counts use tiktoken when it is installed and fall back to a
+~4 characters/token estimate otherwise.
+"""
+import re
+import math
+from collections import Counter
+
+PINNED_SECTIONS = ('IDENTITY.md', 'SOUL.md')
+MIN_TRUNCATED_TOKENS = 64  # don't bother keeping a stub smaller than this
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "\n[...]"
+TRUNCATION_MARKER_TOKENS = 4
+
+# BM25 parameters (standard defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+try:
+    import tiktoken
+    try:
+        _encoding = tiktoken.get_encoding("o200k_base")  # gpt-4o family
+    except Exception:
+        _encoding = None
+except ImportError:
+    _encoding = None
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Counts (or estimates) the tokens in `text`."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if _encoding is not None:
+        return _encoding.decode(_encoding.encode(text, disallowed_special=())[:max_tokens])
+    return text[:max_tokens * CHARS_PER_TOKEN]
+
+
+def _terms(text: str) -> list[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def bm25_scores(query: str, documents: list[str]) -> list[float]:
+    """Scores each document against the query with Okapi BM25."""
+    if not documents:
+        return []
+    doc_terms = [Counter(_terms(d)) for d in documents]
+    lengths = [sum(t.values()) for t in doc_terms]
+    avg_len = (sum(lengths) / len(lengths)) or 1.0
+    n_docs = len(documents)
+
+    query_terms = set(_terms(query))
+    idf = {}
+    for term in query_terms:
+        df = sum(1 for t in doc_terms if term in t)
+        idf[term] = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+    scores = []
+    for terms, length in zip(doc_terms, lengths):
+        score = 0.0
+        for term in query_terms:
+            tf = terms.get(term, 0)
+            if tf:
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len)
+                score += idf[term] * tf * (BM25_K1 + 1) / norm
+        scores.append(score)
+    return scores
+
+
+def assemble_memory(sections: list[dict], query: str, budget_tokens: int,
+                    pinned: tuple = PINNED_SECTIONS) -> tuple[str, dict]:
+    """
+    Packs the most relevant memory sections into `budget_tokens`.
+
+    `sections` are {"name", "text", ...} dicts in their natural order. Pinned
+    sections are always included; the rest are added in BM25 order until the
+    budget runs out (the first one that doesn't fit is truncated if a useful
+    amount of room is left). Kept sections are emitted in their original order.
+
+    Returns (memory_text, report) where report has budget, used, dropped_tokens,
+    kept and dropped section names.
+    """
+    costs = [estimate_tokens(s["text"]) for s in sections]
+    scores = bm25_scores(query, [s["text"] for s in sections])
+
+    kept: dict[int, str] = {}
+    used = 0
+    for i, section in enumerate(sections):
+        if section["name"] in pinned:
+            kept[i] = section["text"]
+            used += costs[i]
+
+    ranked = sorted((i for i in range(len(sections)) if i not in kept),
+                    key=lambda i: scores[i], reverse=True)
+    dropped_tokens = 0
+    dropped = []
+    for i in ranked:
+        remaining = budget_tokens - used
+        if costs[i] <= remaining:
+            kept[i] = sections[i]["text"]
+            used += costs[i]
+        elif remaining >= MIN_TRUNCATED_TOKENS:
+            kept[i] = _truncate_to_tokens(sections[i]["text"], remaining - TRUNCATION_MARKER_TOKENS) + TRUNCATION_MARKER
+            kept_cost = estimate_tokens(kept[i])
+            used += kept_cost
+            dropped_tokens += max(0, costs[i] - kept_cost)
+        else:
+            dropped.append(sections[i]["name"])
+            dropped_tokens += costs[i]
+
+    text = "".join(f"--- {sections[i]['name']} ---\n{kept[i]}\n\n" for i in sorted(kept))
+    report = {
+        "budget": budget_tokens,
+        "used": used,
+        "dropped_tokens": dropped_tokens,
+        "kept": [sections[i]["name"] for i in sorted(kept)],
+        "dropped": dropped,
+    }
+    return text, report
@@ -2,9 +2,8 @@ import sys
 import os
 import json
 import datetime
-from supabase import create_client, Client
 from dotenv import load_dotenv
-from agent_auth import authenticate_agent, get_agent_credentials, SUPABASE_URL, SUPABASE_ANON_KEY
+from agent_auth import session_pool, get_anon_client, SUPABASE_URL, SUPABASE_ANON_KEY
 
 load_dotenv()
 
@@ -18,10 +17,9 @@ def rake_sand(agent_id):
         return {"status": "error", "message": "Supabase credentials missing."}
 
     # Authenticate the agent
-    anon_client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+    anon_client = get_anon_client()
     try:
-        creds = get_agent_credentials(agent_id, anon_client)
-        supabase = authenticate_agent(creds["email"], creds["password"])
+        supabase = session_pool.client_for(agent_id, anon_client)
         print(f"[rake_sand] Handshake complete for {agent_id}")
     except RuntimeError as e:
         print(f"[rake_sand] Auth failed: {e}, falling back to anon client")
@@ -0,0 +1,86 @@
+"""
+Supabase Realtime subscriptions for the (synchronous) Python tools.
+
+The sync supabase client has no realtime support, so RealtimeSubscription
+runs the async client on a private event loop in a daemon thread and hands
+each postgres_changes payload to a plain callback. Callbacks run on that
+background thread; keep them short (enqueue work, set an event) and
+thread-safe.
+
+Usage:
+    sub = RealtimeSubscription(url, key, "sg_chat_messages", on_insert, events=("INSERT",))
+    sub.start()
+"""
+import asyncio
+import threading
+from typing import Callable
+from supabase import create_async_client
+
+STARTUP_TIMEOUT = 15  # seconds to wait for the channel to subscribe
+
+
+def record_of(payload: dict) -> dict:
+    """Extracts the new row from a postgres_changes payload (across realtime-py versions)."""
+    data = payload.get("data", payload) if isinstance(payload, dict) else {}
+    return data.get("record") or data.get("new") or {}
+
+
+class RealtimeSubscription:
+    """A postgres_changes subscription on one table, driven from a background thread."""
+
+    def __init__(self, url: str, key: str, table: str, callback: Callable[[dict], None],
+                 events: tuple = ("INSERT",), schema: str = "public", filter: str = None):
+        self.url = url
+        self.key = key
+        self.table = table
+        self.callback = callback
+        self.events = events
+        self.schema = schema
+        self.filter = filter
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+
+    def _dispatch(self, payload: dict):
+        try:
+            self.callback(record_of(payload))
+        except Exception as e:
+            print(f"[Realtime] Callback error on {self.table}: {e}")
+
+    async def _subscribe(self):
+        client = await create_async_client(self.url, self.key)
+        channel = client.channel(f"tools-{self.table}")
+        for event in self.events:
+            kwargs = {"event": event, "schema": self.schema, "table": self.table, "callback": self._dispatch}
+            if self.filter:
+                kwargs["filter"] = self.filter
+            channel.on_postgres_changes(**kwargs)
+        await channel.subscribe()
+        print(f"[Realtime] Subscribed to {self.schema}.{self.table} ({', '.join(self.events)})")
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._subscribe())
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self) -> bool:
+        """Starts the background subscription. Returns False if it failed to subscribe."""
+        self._thread = threading.Thread(target=self._run, name=f"realtime-{self.table}", daemon=True)
+        self._thread.start()
+        self._ready.wait(STARTUP_TIMEOUT)
+        if self._error or not self._ready.is_set():
+            print(f"[Realtime] ⚠️ Could not subscribe to {self.table}: {self._error or 'timed out'}")
+            return False
+        return True
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
@@ -4,20 +4,63 @@ Soul Garden Studio — Video Rendering Tool
 Polls sg_studio_content for DRAFTING video rows, renders via Remotion CLI,
 uploads to Supabase Storage, and updates the row.
 
+In --loop mode a pool of workers renders several rows at once; the pool size
+defaults to one worker per CORES_PER_RENDER cores, and each render's Remotion
+--concurrency gets an even share of the cores.
+
+Rows are claimed atomically (sg_claim_studio_renders, see
+database/schema/06_studio_render_claims.sql) and held under a lease that is
+renewed while the render runs, so any number of worker processes can share
+the queue and a crashed worker's rows return to DRAFTING.
+
+Renders are content-addressed: the storage object is named after a hash of
+(composition, props, Remotion bundle version), so a prompt that maps to a
+video already in the bucket reuses it without rendering or uploading.
+
+Finished renders are spooled under .cache/renders until their resumable
+(TUS) upload completes, so a failed upload is retried without re-rendering.
+Upload progress is written to the row's `progress` column.
+
+With --server, renders go to a long-lived Node process
+(remotion/render-server.mjs) that bundles once and keeps browsers warm,
+instead of paying npx + webpack + Chromium startup for every video.
+
+Every job records its queue wait and per-stage timings (bundle, render,
+encode, upload) in sg_render_timings; --stats summarises them per
+composition. Frame progress is shown as a percentage on the row.
+
+In --loop mode the worker subscribes to sg_studio_content over Supabase
+Realtime and claims work the moment a video enters DRAFTING (or, for a
+failed render, the moment its RETRY_DELAY runs out); the queue is only
+polled every SAFETY_POLL_INTERVAL as a safety net (or every POLL_INTERVAL
+if Realtime is unavailable or --no-realtime is given).
+
 Usage:
-  python tools/render_video.py           # single poll-and-render cycle
-  python tools/render_video.py --loop    # continuous polling (30s interval)
+  python tools/render_video.py                 # single poll-and-render cycle
+  python tools/render_video.py --loop          # continuous, event-driven
+  python tools/render_video.py --loop --no-realtime   # plain 30s polling
+  python tools/render_video.py --loop --workers 3
+  python tools/render_video.py --loop --server   # persistent render server
+  python tools/render_video.py --stats --days 7  # render timing summary
 """
 import os
-import sys
+import re
 import json
 import time
+import socket
+import hashlib
+import argparse
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
 import subprocess
-import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from tus_upload import ResumableUpload
+from realtime import RealtimeSubscription
 
 # ── Config ────────────────────────────────────────────────────────
 
@@ -27,9 +70,34 @@ load_dotenv(ROOT_DIR / ".env")
 SUPABASE_URL = os.environ.get("VITE_SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
 REMOTION_DIR = ROOT_DIR / "remotion"
+SPOOL_DIR = ROOT_DIR / ".cache" / "renders"  # finished renders awaiting upload
+SPOOL_MAX_AGE = 24 * 3600  # seconds before an orphaned spooled render is deleted
+PROGRESS_INTERVAL = 2.0  # min seconds between progress writes to a row
+TIMINGS_TABLE = "sg_render_timings"
+STAGES = ("queued", "bundle", "render", "encode", "upload")
+STAGE_LABELS = {"bundle": "bundling", "render": "rendering", "encode": "encoding"}  # as shown on the row
 RENDER_BUCKET = "studio-renders"
-POLL_INTERVAL = 30  # seconds between polls in --loop mode
+POLL_INTERVAL = 30  # seconds between polls in --loop mode without Realtime
+SAFETY_POLL_INTERVAL = 300  # seconds between polls when Realtime wakes the worker
+RETRY_DELAY = 60  # seconds before a failed video may be claimed again
 RENDER_TIMEOUT = 300  # 5 minute max render time
+SERVER_START_TIMEOUT = 180  # first bundle + browser launch
+CLAIM_RPC = "sg_claim_studio_renders"
+LEASE_RPC = "sg_renew_studio_lease"
+LEASE_SECONDS = 90  # a claim lapses this long after its worker's last heartbeat
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+CPU_COUNT = os.cpu_count() or 1
+CORES_PER_RENDER = 4  # cores one Remotion render can keep busy
+
+
+def default_workers() -> int:
+    """Concurrent renders for this machine: one per CORES_PER_RENDER cores."""
+    return max(1, CPU_COUNT // CORES_PER_RENDER)
+
+
+def render_concurrency(workers: int) -> int:
+    """Remotion --concurrency for each render when `workers` renders share the machine."""
+    return max(1, CPU_COUNT // max(1, workers))
 
 
 def get_client() -> Client:
@@ -98,8 +166,164 @@ def split_into_lines(text: str) -> list[str]:
 
 # ── Rendering ─────────────────────────────────────────────────────
 
-def render_video(composition_id: str, props: dict, output_path: str) -> None:
-    """Invoke Remotion CLI to render a composition to an MP4 file."""
+class StageClock:
+    """
+    Times the stages of one render (bundle → render → encode) from the
+    progress reports of either render path, and forwards (stage, fraction).
+    """
+
+    def __init__(self, on_progress=None):
+        self.on_progress = on_progress
+        self.durations: dict[str, float] = {}
+        self._stage = "bundle"  # everything before the first frame counts as bundling/startup
+        self._since = time.monotonic()
+
+    def advance(self, stage: str, fraction: float = None):
+        now = time.monotonic()
+        if stage != self._stage:
+            self.durations[self._stage] = self.durations.get(self._stage, 0.0) + now - self._since
+            self._stage, self._since = stage, now
+        if fraction is not None and self.on_progress:
+            self.on_progress(stage, fraction)
+
+    def finish(self) -> dict[str, float]:
+        self.advance(None)
+        return self.durations
+
+
+# Remotion CLI progress lines, e.g. "Bundling 42%", "Rendered 30/150", "Encoded 30/150"
+_CLI_PROGRESS = [
+    ("bundle", re.compile(r"Bundl\w*\D*?(\d+)%")),
+    ("render", re.compile(r"Render\w*\D*?(\d+)\s*/\s*(\d+)")),
+    ("encode", re.compile(r"(?:Encod|Stitch)\w*\D*?(\d+)\s*/\s*(\d+)")),
+]
+
+
+def parse_progress(line: str) -> tuple[str, float]:
+    """Parses a Remotion CLI output line into (stage, fraction), or None."""
+    for stage, pattern in _CLI_PROGRESS:
+        match = pattern.search(line)
+        if match:
+            done = int(match.group(1))
+            total = int(match.group(2)) if match.lastindex > 1 else 100
+            return stage, min(1.0, done / total) if total else 0.0
+    return None
+
+
+class RenderServer:
+    """
+    Runs remotion/render-server.mjs and sends it jobs as JSON lines over stdin.
+    Thread-safe: any number of renders can be in flight; the server spreads
+    them over its browser pool. Restarted automatically if it exits.
+    """
+
+    def __init__(self, browsers: int = 1):
+        self.browsers = max(1, browsers)
+        self._proc = None
+        self._ready = threading.Event()
+        self._jobs: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                return
+            print(f"[Render] Starting render server ({self.browsers} browser(s))...")
+            self._ready.clear()
+            self._proc = subprocess.Popen(
+                ["node", "render-server.mjs", "--browsers", str(self.browsers)],
+                cwd=str(REMOTION_DIR),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+            )
+            threading.Thread(target=self._read, args=(self._proc,), name="render-server", daemon=True).start()
+        if not self._ready.wait(SERVER_START_TIMEOUT):
+            raise RuntimeError("Render server did not become ready")
+        print("[Render] Render server ready.")
+
+    def _read(self, proc: subprocess.Popen):
+        for line in proc.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if message.get("type") == "ready":
+                self._ready.set()
+                continue
+            job = self._jobs.get(message.get("id"))
+            if job is None:
+                continue
+            if message["type"] == "progress":
+                if job["on_progress"]:
+                    job["on_progress"](message.get("stage", "render"), message["progress"])
+            else:
+                job["result"] = message
+                job["event"].set()
+
+        # The server exited: fail whatever it was still rendering
+        for job in list(self._jobs.values()):
+            job.setdefault("result", {"type": "error", "message": "Render server exited"})
+            job["event"].set()
+
+    def render(self, composition_id: str, props: dict, output_path: str,
+               concurrency: int = None, on_progress=None, timeout: float = RENDER_TIMEOUT):
+        self.start()
+        job_id = uuid.uuid4().hex
+        job = {"event": threading.Event(), "on_progress": on_progress}
+        self._jobs[job_id] = job
+        try:
+            with self._lock:
+                self._proc.stdin.write(json.dumps({
+                    "id": job_id, "composition": composition_id, "props": props,
+                    "output": output_path, "concurrency": concurrency,
+                }) + "\n")
+                self._proc.stdin.flush()
+            if not job["event"].wait(timeout):
+                raise RuntimeError(f"Render timed out after {timeout}s")
+        finally:
+            self._jobs.pop(job_id, None)
+
+        if job["result"]["type"] == "error":
+            raise RuntimeError(f"Remotion render failed:\n{job['result']['message'][-500:]}")
+
+    def stop(self):
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=30)
+
+
+# Set by main() in --server mode; render_video() uses it when present
+render_server: RenderServer = None
+
+
+def render_video(composition_id: str, props: dict, output_path: str, concurrency: int = None,
+                 on_progress=None) -> dict[str, float]:
+    """
+    Render a composition to an MP4 file (via the render server if running, else the Remotion CLI).
+    Calls on_progress(stage, fraction) as frames render; returns seconds spent per stage.
+    """
+    clock = StageClock(on_progress)
+    if render_server is not None:
+        print(f"[Render] Server job: {composition_id}")
+        render_server.render(composition_id, props, output_path, concurrency, on_progress=clock.advance)
+    else:
+        _render_with_cli(composition_id, props, output_path, concurrency, on_progress=clock.advance)
+    durations = clock.finish()
+
+    if not os.path.exists(output_path):
+        raise RuntimeError(f"Render completed but output file not found: {output_path}")
+
+    size_mb = os.path.getsize(output_path) / (1024 * 1024)
+    print(f"[Render] Complete: {output_path} ({size_mb:.1f} MB)")
+    return durations
+
+
+def _render_with_cli(composition_id: str, props: dict, output_path: str, concurrency: int = None,
+                     on_progress=None) -> None:
+    """Invoke Remotion CLI to render a composition to an MP4 file, following its progress output."""
     cmd = [
         "npx",
         "remotion",
@@ -109,130 +333,515 @@ def render_video(composition_id: str, props: dict, output_path: str) -> None:
         output_path,
         f"--props={json.dumps(props)}",
         "--codec=h264",
+        f"--concurrency={concurrency or render_concurrency(1)}",
     ]
 
     print(f"[Render] Running: {' '.join(cmd[:6])}...")
-    result = subprocess.run(
+    proc = subprocess.Popen(
         cmd,
         cwd=str(REMOTION_DIR),
-        capture_output=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
         text=True,
-        timeout=RENDER_TIMEOUT,
-        shell=True,  # needed on Windows for npx
+        shell=os.name == "nt",  # needed on Windows for npx; on POSIX a shell would drop the args
     )
-
-    if result.returncode != 0:
-        error_msg = result.stderr or result.stdout or "Unknown render error"
+    watchdog = threading.Timer(RENDER_TIMEOUT, proc.kill)
+    watchdog.start()
+    tail = []
+    try:
+        # Progress redraws arrive as \r-separated updates, so split on both
+        for line in iter(proc.stdout.readline, ""):
+            for part in line.split("\r"):
+                progress = parse_progress(part)
+                if progress and on_progress:
+                    on_progress(*progress)
+            tail = (tail + [line])[-20:]
+        returncode = proc.wait()
+    finally:
+        watchdog.cancel()
+
+    if returncode != 0:
+        error_msg = "".join(tail) or "Unknown render error"
         raise RuntimeError(f"Remotion render failed:\n{error_msg[-500:]}")
 
-    if not os.path.exists(output_path):
-        raise RuntimeError(f"Render completed but output file not found: {output_path}")
-
-    size_mb = os.path.getsize(output_path) / (1024 * 1024)
-    print(f"[Render] Complete: {output_path} ({size_mb:.1f} MB)")
-
 
 # ── Upload ────────────────────────────────────────────────────────
 
-def upload_to_storage(client: Client, local_path: str, row_id: str) -> str:
-    """Upload rendered video to Supabase Storage and return the public URL."""
-    storage_path = f"videos/{row_id}.mp4"
+def public_url_for(storage_path: str) -> str:
+    return f"{SUPABASE_URL}/storage/v1/object/public/{RENDER_BUCKET}/{storage_path}"
 
-    with open(local_path, "rb") as f:
-        client.storage.from_(RENDER_BUCKET).upload(
-            storage_path,
-            f,
-            {"content-type": "video/mp4"},
-        )
 
-    public_url = f"{SUPABASE_URL}/storage/v1/object/public/{RENDER_BUCKET}/{storage_path}"
+def upload_to_storage(client: Client, local_path: str, storage_path: str, on_progress=None) -> str:
+    """Upload rendered video to Supabase Storage (resumable, chunked) and return the public URL."""
+    # Identical renders share an object, so a concurrent duplicate just overwrites it
+    ResumableUpload(
+        SUPABASE_URL, SUPABASE_SERVICE_KEY, RENDER_BUCKET, storage_path,
+        local_path, content_type="video/mp4", on_progress=on_progress,
+    ).run()
+
+    public_url = public_url_for(storage_path)
     print(f"[Upload] {public_url}")
     return public_url
 
 
+class ProgressReporter:
+    """Writes {"stage", "percent"} to a row's progress column, at most every PROGRESS_INTERVAL seconds."""
+
+    def __init__(self, client: Client, row_id: str):
+        self.client = client
+        self.row_id = row_id
+        self._last = (None, -1, 0.0)
+
+    def __call__(self, stage: str, fraction: float):
+        percent = int(fraction * 100)
+        last_stage, last_percent, last_at = self._last
+        now = time.monotonic()
+        if stage == last_stage and (percent == last_percent or (now - last_at < PROGRESS_INTERVAL and percent < 100)):
+            return
+        self._last = (stage, percent, now)
+        print(f"[Studio] {self.row_id}: {stage} {percent}%")
+        try:
+            self.client.table("sg_studio_content").update(
+                {"progress": {"stage": stage, "percent": percent}}
+            ).eq("id", self.row_id).eq("claimed_by", WORKER_ID).execute()
+        except Exception as e:
+            # Progress is cosmetic; never fail a job over it
+            print(f"[Studio] Progress update failed for {self.row_id}: {e}")
+
+
+def prune_spool():
+    """Deletes spooled renders (and their upload state) older than SPOOL_MAX_AGE."""
+    if not SPOOL_DIR.exists():
+        return
+    cutoff = time.time() - SPOOL_MAX_AGE
+    for path in SPOOL_DIR.iterdir():
+        if path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+
+
+# ── Render Cache ──────────────────────────────────────────────────
+
+def bundle_version() -> str:
+    """Hash of everything the Remotion bundle is built from (package.json + src/)."""
+    digest = hashlib.sha256()
+    sources = [REMOTION_DIR / "package.json"] + sorted((REMOTION_DIR / "src").rglob("*"))
+    for path in sources:
+        if path.is_file():
+            digest.update(str(path.relative_to(REMOTION_DIR)).encode("utf-8"))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def render_key(composition_id: str, props: dict) -> str:
+    """Content address of a render: same composition, props and bundle → same video."""
+    raw = json.dumps([composition_id, props, bundle_version()], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def cached_render_path(key: str) -> str:
+    return f"renders/{key}.mp4"
+
+
+def find_cached_render(client: Client, key: str) -> str:
+    """Returns the public URL of an existing render with this key, or None."""
+    try:
+        found = client.storage.from_(RENDER_BUCKET).list("renders", {"search": key})
+    except Exception as e:
+        print(f"[Cache] Lookup failed ({e}); rendering.")
+        return None
+    if any(item.get("name") == f"{key}.mp4" for item in found or []):
+        return public_url_for(cached_render_path(key))
+    return None
+
+
 # ── Main Pipeline ─────────────────────────────────────────────────
 
-def process_one(client: Client) -> bool:
+def claim_rows(client: Client, limit: int = 1) -> list[dict]:
     """
-    Poll for one DRAFTING video row, render it, upload, update.
-    Returns True if a row was processed, False if none found.
+    Atomically claims up to `limit` of the oldest DRAFTING videos for this worker
+    (status → RENDERING under a lease) and returns them.
     """
-    # 1. Find the oldest DRAFTING video
+    try:
+        resp = client.rpc(CLAIM_RPC, {
+            "p_worker": WORKER_ID, "p_limit": limit, "p_lease_seconds": LEASE_SECONDS,
+        }).execute()
+        return resp.data or []
+    except Exception as e:
+        print(f"[Studio] ⚠️ {CLAIM_RPC} unavailable ({e}); claiming with conditional updates.")
+    return _claim_rows_conditionally(client, limit)
+
+
+def _claim_rows_conditionally(client: Client, limit: int) -> list[dict]:
+    """Fallback claim: each update only applies WHERE status='DRAFTING', so a row has one winner."""
+    now = datetime.now(timezone.utc)
+    client.table("sg_studio_content").update(
+        {"status": "DRAFTING", "claimed_by": None, "lease_expires_at": None}
+    ).eq("status", "RENDERING").lt("lease_expires_at", now.isoformat()).execute()
+
     resp = (
         client.table("sg_studio_content")
-        .select("*")
+        .select("id")
         .eq("status", "DRAFTING")
         .eq("type", "video")
+        .or_(f"lease_expires_at.is.null,lease_expires_at.lte.{now:%Y-%m-%dT%H:%M:%SZ}")
         .order("created_at", desc=False)
-        .limit(1)
+        .limit(limit)
         .execute()
     )
 
-    if not resp.data:
-        return False
+    claimed = []
+    lease = (now + timedelta(seconds=LEASE_SECONDS)).isoformat()
+    for candidate in resp.data or []:
+        won = client.table("sg_studio_content").update(
+            {"status": "RENDERING", "claimed_by": WORKER_ID, "lease_expires_at": lease}
+        ).eq("id", candidate["id"]).eq("status", "DRAFTING").execute()
+        claimed.extend(won.data or [])
+    return claimed
+
+
+class LeaseLost(RuntimeError):
+    """Another worker has reclaimed a row this worker was rendering."""
+
+
+class Lease:
+    """
+    Renews a claimed row's lease on a background thread until stopped.
+    If a renewal finds the row no longer ours, `lost` is set; check() raises LeaseLost.
+    """
+
+    def __init__(self, client: Client, row_id: str):
+        self.client = client
+        self.row_id = row_id
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{row_id}", daemon=True)
+
+    def _renew(self) -> bool:
+        """Extends the lease. Returns False if the row is no longer ours; raises if the renewal could not be made."""
+        try:
+            return bool(self.client.rpc(LEASE_RPC, {
+                "p_id": self.row_id, "p_worker": WORKER_ID, "p_lease_seconds": LEASE_SECONDS,
+            }).execute().data)
+        except Exception:
+            lease = (datetime.now(timezone.utc) + timedelta(seconds=LEASE_SECONDS)).isoformat()
+            return bool(self.client.table("sg_studio_content").update({"lease_expires_at": lease})
+                        .eq("id", self.row_id).eq("claimed_by", WORKER_ID).execute().data)
+
+    def _run(self):
+        while not self._stop.wait(LEASE_SECONDS / 3):
+            try:
+                held = self._renew()
+            except Exception as e:
+                # A network blip says nothing about ownership: try again next interval
+                print(f"[Studio] ⚠️ Could not renew the lease on {self.row_id}: {e}")
+                continue
+            if not held:
+                print(f"[Studio] ⚠️ Lost the lease on {self.row_id}")
+                self.lost.set()
+                return
+
+    def check(self):
+        if self.lost.is_set():
+            raise LeaseLost(f"Lost the lease on {self.row_id}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _queued_seconds(row: dict) -> float:
+    """Time a row waited in DRAFTING before this worker picked it up."""
+    try:
+        created = datetime.fromisoformat(row["created_at"].replace("Z", "+00:00"))
+    except (KeyError, AttributeError, ValueError):
+        return None
+    return max(0.0, (datetime.now(timezone.utc) - created).total_seconds())
+
+
+def record_timings(client: Client, row: dict, composition_id: str, outcome: str,
+                   durations: dict[str, float], total: float):
+    """Stores one job's stage timings in sg_render_timings (never fails the job)."""
+    record = {
+        "content_id": row["id"],
+        "composition_id": composition_id,
+        "worker": WORKER_ID,
+        "outcome": outcome,
+        "total_ms": int(total * 1000),
+    }
+    for stage in STAGES:
+        if durations.get(stage) is not None:
+            record[f"{stage}_ms"] = int(durations[stage] * 1000)
+    try:
+        client.table(TIMINGS_TABLE).insert(record).execute()
+    except Exception as e:
+        print(f"[Studio] Could not record timings for {row['id']}: {e}")
 
-    row = resp.data[0]
+
+def process_row(client: Client, row: dict, concurrency: int = None) -> bool:
+    """
+    Render, upload and update one claimed row.
+    Returns True on success; on failure the row goes back to DRAFTING. If the
+    lease is lost the row belongs to another worker, so it is left untouched.
+    """
     row_id = row["id"]
     prompt = row.get("prompt", "Soul Garden")
     print(f"\n[Studio] Processing: {row_id}")
     print(f"[Studio] Prompt: {prompt}")
 
-    # 2. Claim — set status to RENDERING
-    client.table("sg_studio_content").update({"status": "RENDERING"}).eq(
-        "id", row_id
-    ).execute()
-
+    started = time.monotonic()
+    durations = {"queued": _queued_seconds(row)}
+    composition_id, outcome = None, "failed"
     try:
-        # 3. Map prompt → composition + props
+        # 1. Map prompt → composition + props
         composition_id, props = map_prompt_to_composition(prompt)
         print(f"[Studio] Composition: {composition_id}")
-
-        # 4. Render to temp file
-        with tempfile.TemporaryDirectory() as tmpdir:
-            output_path = os.path.join(tmpdir, f"{row_id}.mp4")
-            render_video(composition_id, props, output_path)
-
-            # 5. Upload to Supabase Storage
-            media_url = upload_to_storage(client, output_path, row_id)
-
-        # 6. Update row → PENDING_REVIEW
-        client.table("sg_studio_content").update(
-            {"status": "PENDING_REVIEW", "media_url": media_url}
-        ).eq("id", row_id).execute()
-
-        print(f"[Studio] Done! Status → PENDING_REVIEW")
+        key = render_key(composition_id, props)
+
+        media_url = find_cached_render(client, key)
+        if media_url:
+            print(f"[Cache] Hit {key[:12]}: reusing {media_url}")
+            outcome = "cache_hit"
+        else:
+            report = ProgressReporter(client, row_id)
+            spool_path = SPOOL_DIR / f"{key}.mp4"
+            with Lease(client, row_id) as lease:
+                # 2. Render into the spool (heartbeating the claim meanwhile).
+                # A spooled file means an earlier attempt rendered it but failed to upload.
+                if spool_path.exists():
+                    print(f"[Studio] Reusing spooled render {spool_path.name}")
+                    outcome = "spooled"
+                else:
+                    SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+                    partial_path = SPOOL_DIR / f"{key}.{row_id}.part.mp4"
+                    durations.update(render_video(
+                        composition_id, props, str(partial_path), concurrency,
+                        on_progress=lambda stage, fraction: report(STAGE_LABELS[stage], fraction),
+                    ))
+                    os.replace(partial_path, spool_path)
+                    outcome = "rendered"
+                lease.check()
+
+                # 3. Upload to Supabase Storage
+                upload_started = time.monotonic()
+                media_url = upload_to_storage(
+                    client, str(spool_path), cached_render_path(key),
+                    on_progress=lambda fraction: report("uploading", fraction),
+                )
+                durations["upload"] = time.monotonic() - upload_started
+                lease.check()
+            spool_path.unlink(missing_ok=True)
+
+        # 4. Update row → PENDING_REVIEW (only while we still hold the claim)
+        done = client.table("sg_studio_content").update(
+            {"status": "PENDING_REVIEW", "media_url": media_url,
+             "claimed_by": None, "lease_expires_at": None, "progress": None}
+        ).eq("id", row_id).eq("claimed_by", WORKER_ID).execute()
+        if not done.data:
+            raise LeaseLost(f"{row_id} was reclaimed before it could be marked PENDING_REVIEW")
+
+        print(f"[Studio] Done! {row_id} → PENDING_REVIEW ({time.monotonic() - started:.1f}s, {outcome})")
         return True
 
+    except LeaseLost as e:
+        outcome = "lease_lost"
+        print(f"[Studio] ⚠️ {e}; leaving the row to its new worker.")
+        return False
+
     except Exception as e:
         # On failure, reset to DRAFTING with error feedback
+        outcome = "failed"
         error_msg = str(e)[:500]
-        print(f"[Studio] ERROR: {error_msg}")
+        print(f"[Studio] ERROR ({row_id}): {error_msg}")
+        # On a DRAFTING row, lease_expires_at is the earliest retry time
+        retry_at = (datetime.now(timezone.utc) + timedelta(seconds=RETRY_DELAY)).isoformat()
         client.table("sg_studio_content").update(
-            {"status": "DRAFTING", "feedback": f"Render failed: {error_msg}"}
-        ).eq("id", row_id).execute()
+            {"status": "DRAFTING", "feedback": f"Render failed: {error_msg}",
+             "claimed_by": None, "lease_expires_at": retry_at, "progress": None}
+        ).eq("id", row_id).eq("claimed_by", WORKER_ID).execute()
         return False
 
+    finally:
+        record_timings(client, row, composition_id, outcome, durations, time.monotonic() - started)
+
+
+def process_one(client: Client) -> bool:
+    """
+    Poll for one DRAFTING video row, render it, upload, update.
+    Returns True if a row was processed, False if none found.
+    """
+    rows = claim_rows(client, 1)
+    if not rows:
+        return False
+    return process_row(client, rows[0], render_concurrency(1))
+
+
+def _retry_delay(record: dict) -> float:
+    """Seconds until a DRAFTING row's retry delay (its lease_expires_at) ends, or None if it is claimable now."""
+    try:
+        retry_at = datetime.fromisoformat(record["lease_expires_at"].replace("Z", "+00:00"))
+    except (KeyError, AttributeError, ValueError):
+        return None
+    delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+    return delay if delay > 0 else None
+
+
+def subscribe_to_queue(wakeup: threading.Event, on_retry=None) -> RealtimeSubscription:
+    """
+    Sets `wakeup` whenever a video row enters DRAFTING, and calls on_retry(delay)
+    for rows that only become claimable after a retry delay.
+    Returns None if Realtime is unavailable.
+    """
+    def on_change(record: dict):
+        if record.get("type", "video") == "video":
+            wakeup.set()
+            delay = _retry_delay(record)
+            if delay is not None and on_retry:
+                on_retry(delay)
+
+    subscription = RealtimeSubscription(
+        SUPABASE_URL, SUPABASE_SERVICE_KEY, "sg_studio_content", on_change,
+        events=("INSERT", "UPDATE"), filter="status=eq.DRAFTING",
+    )
+    return subscription if subscription.start() else None
+
+
+def run_pool(client: Client, workers: int, realtime: bool = True):
+    """
+    Keeps up to `workers` renders in flight. The worker wakes when a render
+    finishes, when a failed video's RETRY_DELAY runs out, or (with Realtime)
+    when a video enters DRAFTING; otherwise the queue is polled every
+    SAFETY_POLL_INTERVAL (POLL_INTERVAL without Realtime).
+    """
+    concurrency = render_concurrency(workers)
+    print(f"[Studio] Worker pool: {workers} render(s) at a time, --concurrency={concurrency} each")
+
+    wakeup = threading.Event()
+    retries: list[float] = []  # monotonic times at which failed rows become claimable again
+    retries_lock = threading.Lock()
+
+    def schedule_retry(delay: float):
+        with retries_lock:
+            retries.append(time.monotonic() + delay + 1)  # a second of slack for clock skew
+
+    def on_done(future):
+        if not future.cancelled() and future.exception() is None and future.result() is False:
+            schedule_retry(RETRY_DELAY)
+        wakeup.set()
+
+    subscription = subscribe_to_queue(wakeup, schedule_retry) if realtime else None
+    poll_interval = SAFETY_POLL_INTERVAL if subscription else POLL_INTERVAL
+    if realtime and not subscription:
+        print(f"[Studio] Realtime unavailable; polling every {POLL_INTERVAL}s.")
+
+    in_flight = set()
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render") as pool:
+            while True:
+                free = workers - len(in_flight)
+                if free > 0:
+                    try:
+                        rows = claim_rows(client, free)
+                    except Exception as e:
+                        print(f"[Studio] Unexpected error: {e}")
+                        rows = []
+                    for row in rows:
+                        future = pool.submit(process_row, client, row, concurrency)
+                        future.add_done_callback(on_done)
+                        in_flight.add(future)
+                    if not in_flight:
+                        print(f"[Studio] No DRAFTING videos. Waiting up to {poll_interval}s...")
+
+                with retries_lock:
+                    now = time.monotonic()
+                    retries[:] = [at for at in retries if at > now]
+                    timeout = min([poll_interval] + [at - now for at in retries])
+                wakeup.wait(timeout)
+                wakeup.clear()
+                in_flight = {future for future in in_flight if not future.done()}
+    finally:
+        if subscription is not None:
+            subscription.stop()
+
+
+# ── Stats ───────────────────────────────────────────────────────
+
+def _percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+def print_stats(client: Client, days: int):
+    """Summarises sg_render_timings per composition over the last `days` days."""
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    resp = client.table(TIMINGS_TABLE).select("*").gte("created_at", since).execute()
+    rows = resp.data or []
+    print(f"[Stats] {len(rows)} job(s) in the last {days} day(s)")
+    if not rows:
+        return
+
+    by_composition: dict[str, list[dict]] = {}
+    for row in rows:
+        by_composition.setdefault(row.get("composition_id") or "(unmapped)", []).append(row)
+
+    print(f"{'composition':<20} {'jobs':>5} {'fail':>5} {'cache':>6} {'p50 s':>7} {'p95 s':>7}  "
+          + "  ".join(f"{stage + ' s':>9}" for stage in STAGES))
+    for composition_id, jobs in sorted(by_composition.items()):
+        done = [j for j in jobs if j.get("outcome") not in ("failed", "lease_lost")]
+        totals = [j["total_ms"] / 1000 for j in done if j.get("total_ms") is not None]
+        hits = sum(1 for j in jobs if j.get("outcome") == "cache_hit")
+        means = []
+        for stage in STAGES:
+            values = [j[f"{stage}_ms"] / 1000 for j in done if j.get(f"{stage}_ms") is not None]
+            means.append(f"{sum(values) / len(values):>9.1f}" if values else f"{'-':>9}")
+        p50 = f"{_percentile(totals, 50):>7.1f}" if totals else f"{'-':>7}"
+        p95 = f"{_percentile(totals, 95):>7.1f}" if totals else f"{'-':>7}"
+        print(f"{composition_id:<20} {len(jobs):>5} {len(jobs) - len(done):>5} "
+              f"{hits / len(jobs):>6.0%} {p50} {p95}  " + "  ".join(means))
+
 
 def main():
-    loop_mode = "--loop" in sys.argv
+    parser = argparse.ArgumentParser(description="Render DRAFTING Studio videos with Remotion")
+    parser.add_argument("--loop", action="store_true", help="Keep polling for new videos")
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help=f"Concurrent renders in --loop mode (default: {default_workers()} on {CPU_COUNT} cores)")
+    parser.add_argument("--server", action="store_true",
+                        help="Render through a persistent Node render server (one warm browser per worker)")
+    parser.add_argument("--no-realtime", action="store_true",
+                        help="In --loop mode, poll every POLL_INTERVAL instead of waking on Realtime events")
+    parser.add_argument("--stats", action="store_true", help="Print render timing stats and exit")
+    parser.add_argument("--days", type=int, default=7, help="Window for --stats (default: 7 days)")
+    args = parser.parse_args()
     client = get_client()
 
-    print(f"[Studio] Render tool started {'(loop mode)' if loop_mode else '(single run)'}")
+    if args.stats:
+        print_stats(client, args.days)
+        return
+
+    prune_spool()
+
+    global render_server
+    if args.server:
+        render_server = RenderServer(browsers=max(1, args.workers) if args.loop else 1)
+        render_server.start()
+
+    print(f"[Studio] Render tool started {'(loop mode)' if args.loop else '(single run)'}")
     print(f"[Studio] Remotion dir: {REMOTION_DIR}")
     print(f"[Studio] Supabase: {SUPABASE_URL}")
 
-    if loop_mode:
-        while True:
-            try:
-                processed = process_one(client)
-                if not processed:
-                    print(f"[Studio] No DRAFTING videos. Sleeping {POLL_INTERVAL}s...")
-            except Exception as e:
-                print(f"[Studio] Unexpected error: {e}")
-            time.sleep(POLL_INTERVAL)
-    else:
-        process_one(client)
-        print("[Studio] Single run complete.")
+    try:
+        if args.loop:
+            run_pool(client, max(1, args.workers), realtime=not args.no_realtime)
+        else:
+            process_one(client)
+            print("[Studio] Single run complete.")
+    finally:
+        if render_server is not None:
+            render_server.stop()
 
 
 if __name__ == "__main__":
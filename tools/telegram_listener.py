@@ -1,6 +1,7 @@
 import os
 import asyncio
 from telegram import Update
+from telegram.error import BadRequest, RetryAfter
 from telegram.ext import ApplicationBuilder, MessageHandler, filters, ContextTypes
 from supabase import create_client, Client
 from dotenv import load_dotenv
@@ -21,6 +22,9 @@ if not SUPABASE_URL or not SUPABASE_KEY or not TELEGRAM_BOT_TOKEN:
 
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+# Minimum seconds between progressive edits of a streamed reply
+STREAM_EDIT_INTERVAL = 1.0
+
 # Pre-load our agents to avoid DB lookups on every single message
 agent_cache = {}
 
@@ -37,6 +41,68 @@ def get_agent_by_name(name: str) -> OpenClawAgent:
         return agent
     return None
 
+def _retry_seconds(error: RetryAfter) -> float:
+    delay = error.retry_after
+    return delay.total_seconds() if hasattr(delay, "total_seconds") else float(delay)
+
+async def edit_reply(message, text: str, final: bool = False) -> float:
+    """
+    Edits a streamed reply in place, never raising for Telegram's refusals.
+    Returns the seconds Telegram asked us to back off for (0 otherwise); a
+    throttled final edit waits that long and retries once.
+    """
+    try:
+        await message.edit_text(text)
+        return 0.0
+    except RetryAfter as e:
+        delay = _retry_seconds(e)
+        if not final:
+            return delay
+        await asyncio.sleep(delay)
+        return await edit_reply(message, text)
+    except BadRequest as e:
+        # "Message is not modified" just means there was nothing new to show
+        if "not modified" not in str(e).lower():
+            print(f"⚠️ Telegram rejected an edit: {e}")
+        return 0.0
+
+async def stream_reply(update: Update, agent: OpenClawAgent, user_message: str, sender_name: str, garden_context: dict) -> str:
+    """
+    Streams the agent's reply into a single Telegram message, editing it as
+    fragments arrive (throttled to respect Telegram's edit rate limits).
+    Returns the full reply text.
+    """
+    fragments = agent.respond_to_user_stream(user_message, sender_name, garden_context)
+    reply_text = ""
+    shown = ""
+    sent = None
+    last_edit = 0.0
+    loop = asyncio.get_running_loop()
+
+    while True:
+        # The LLM stream is a blocking generator; pull each fragment off the event loop
+        fragment = await asyncio.to_thread(next, fragments, None)
+        if fragment is None:
+            break
+        reply_text += fragment
+        if not reply_text.strip():
+            continue  # Telegram rejects blank messages
+
+        now = loop.time()
+        if sent is None:
+            sent = await update.message.reply_text(reply_text)
+            shown, last_edit = reply_text, now
+        elif now - last_edit >= STREAM_EDIT_INTERVAL and reply_text.strip() != shown.strip():
+            backoff = await edit_reply(sent, reply_text)
+            if not backoff:
+                shown = reply_text
+            last_edit = now + backoff
+
+    # Final edit so the message shows the complete reply
+    if sent is not None and shown.strip() != reply_text.strip():
+        await edit_reply(sent, reply_text, final=True)
+    return reply_text
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_message = update.message.text
     print(f"📥 Received from Telegram: {user_message}")
@@ -56,9 +122,11 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"*(Silence... {target_name} is not in the garden right now.)*")
         return
         
-    # Generate the response
+    # Generate the response, streaming it into Telegram as it arrives
     print(f"[{agent.name}] is thinking about a reply...")
-    reply_text = agent.respond_to_user(user_message)
+    sender_name = update.effective_user.first_name if update.effective_user else "Visitor"
+    garden_context = await asyncio.to_thread(agent.observe)
+    reply_text = await stream_reply(update, agent, user_message, sender_name, garden_context)
     print(f"[{agent.name}] Replies: {reply_text[:50]}...")
     
     # Log the interaction as an event in Supabase so the Garden remembers
@@ -81,9 +149,6 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "message": reply_text
         }
     }).execute()
-    
-    # Send the reply back to the human
-    await update.message.reply_text(reply_text)
 
 if __name__ == '__main__':
     print("🌿 Starting Telegram Listener... (Press Ctrl+C to stop)")
@@ -0,0 +1,105 @@
+"""
+Per-tick write buffer for OpenClaw agents.
+Collects every mutation an agent makes during one tick (journal entries,
+events, chat messages, presence) and flushes them in a single round trip
+through the sg_apply_tick RPC (database/schema/03_tick_writes_rpc.sql).
+
+If the RPC isn't installed yet, flush() falls back to one request per write
+so agents keep working against an un-migrated database. Any other RPC error
+is re-raised: the RPC is atomic, so replaying it op by op could duplicate or
+half-apply the tick.
+"""
+from supabase import Client, AsyncClient
+
+TICK_RPC = "sg_apply_tick"
+MISSING_FUNCTION_CODES = {"PGRST202", "404"}  # PostgREST: function not found
+
+
+def _rpc_missing(error: Exception) -> bool:
+    """True if `error` means the RPC is not installed (as opposed to having failed)."""
+    return str(getattr(error, "code", "")) in MISSING_FUNCTION_CODES
+
+
+class TickWriteBuffer:
+    """
+    An ordered list of inserts/upserts for one agent tick.
+
+    Repeated upserts of the same row (same table and conflict key) are merged,
+    so e.g. check_messages and act both touching sg_presence costs one write
+    and the last value wins, exactly as it would with two upserts.
+    """
+    def __init__(self, agent_id: str):
+        self.agent_id = agent_id
+        self.ops: list[dict] = []
+        self._upserts: dict[tuple, dict] = {}
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def insert(self, table: str, row: dict):
+        """Queues an insert."""
+        self.ops.append({"op": "insert", "table": table, "row": row})
+
+    def upsert(self, table: str, row: dict, on_conflict: str):
+        """Queues an upsert, merging into an earlier upsert of the same row."""
+        key = (table, on_conflict, str(row.get(on_conflict)))
+        existing = self._upserts.get(key)
+        if existing:
+            existing["row"].update(row)
+            return
+        op = {"op": "upsert", "table": table, "row": dict(row), "on_conflict": on_conflict}
+        self._upserts[key] = op
+        self.ops.append(op)
+
+    def presence(self, **fields):
+        """Queues an sg_presence upsert for this buffer's agent."""
+        self.upsert("sg_presence", {"agent_id": self.agent_id, **fields}, on_conflict="agent_id")
+
+    def pending_presence(self) -> dict:
+        """Returns the merged sg_presence row queued for this agent, or None."""
+        op = self._upserts.get(("sg_presence", "agent_id", str(self.agent_id)))
+        return dict(op["row"]) if op else None
+
+    def _take(self) -> list[dict]:
+        ops, self.ops, self._upserts = self.ops, [], {}
+        return ops
+
+    def flush(self, client: Client) -> int:
+        """Applies all queued writes in one RPC call. Returns the number of writes applied."""
+        ops = self._take()
+        if not ops:
+            return 0
+        try:
+            client.rpc(TICK_RPC, {"p_ops": ops}).execute()
+        except Exception as e:
+            if not _rpc_missing(e):
+                print(f"[{self.agent_id}] ⚠️ {TICK_RPC} failed: {e}")
+                raise
+            print(f"[{self.agent_id}] ⚠️ {TICK_RPC} unavailable ({e}); writing individually.")
+            for op in ops:
+                _apply_op(client, op).execute()
+        return len(ops)
+
+    async def aflush(self, client: AsyncClient) -> int:
+        """Async variant of flush()."""
+        ops = self._take()
+        if not ops:
+            return 0
+        try:
+            await client.rpc(TICK_RPC, {"p_ops": ops}).execute()
+        except Exception as e:
+            if not _rpc_missing(e):
+                print(f"[{self.agent_id}] ⚠️ {TICK_RPC} failed: {e}")
+                raise
+            print(f"[{self.agent_id}] ⚠️ {TICK_RPC} unavailable ({e}); writing individually.")
+            for op in ops:
+                await _apply_op(client, op).execute()
+        return len(ops)
+
+
+def _apply_op(client, op: dict):
+    """Builds the single-table request for one buffered op (fallback path)."""
+    table = client.table(op["table"])
+    if op["op"] == "upsert":
+        return table.upsert(op["row"], on_conflict=op["on_conflict"])
+    return table.insert(op["row"])
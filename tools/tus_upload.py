@@ -0,0 +1,133 @@
+"""
+Resumable (TUS) uploads to Supabase Storage.
+
+Files are sent in fixed 6 MB chunks to /storage/v1/upload/resumable. The
+upload URL is remembered next to the file (`<file>.tus`), so a failed
+chunk is retried from the server's confirmed offset, and even a later run
+of the worker resumes the same upload instead of starting over.
+"""
+import os
+import json
+import time
+import base64
+import random
+from urllib.parse import urljoin
+
+import httpx
+
+TUS_VERSION = "1.0.0"
+CHUNK_SIZE = 6 * 1024 * 1024  # Supabase requires exactly 6 MB chunks (except the last)
+MAX_ATTEMPTS = 5  # consecutive failures tolerated per chunk
+BACKOFF_CAP = 30.0  # seconds
+TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+
+def _metadata(**fields) -> str:
+    return ",".join(f"{k} {base64.b64encode(v.encode('utf-8')).decode('ascii')}" for k, v in fields.items())
+
+
+class ResumableUpload:
+    """One file → one storage object. Call run(); it returns once the whole file is stored."""
+
+    def __init__(self, supabase_url: str, api_key: str, bucket: str, object_name: str,
+                 local_path: str, content_type: str = "video/mp4", on_progress=None):
+        self.endpoint = f"{supabase_url}/storage/v1/upload/resumable"
+        self.bucket = bucket
+        self.object_name = object_name
+        self.local_path = local_path
+        self.content_type = content_type
+        self.on_progress = on_progress
+        self.size = os.path.getsize(local_path)
+        self.state_path = f"{local_path}.tus"
+        self.headers = {"Authorization": f"Bearer {api_key}", "apikey": api_key, "Tus-Resumable": TUS_VERSION}
+
+    # ── Upload URL state ─────────────────────────────────────────
+
+    def _saved_url(self) -> str:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("object") != self.object_name or state.get("size") != self.size:
+            return None
+        return state.get("url")
+
+    def _save_url(self, url: str):
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump({"url": url, "object": self.object_name, "size": self.size}, f)
+
+    # ── Protocol ─────────────────────────────────────────────────
+
+    def _create(self, http: httpx.Client) -> str:
+        resp = http.post(self.endpoint, headers={
+            **self.headers,
+            "Upload-Length": str(self.size),
+            "Upload-Metadata": _metadata(
+                bucketName=self.bucket, objectName=self.object_name,
+                contentType=self.content_type, cacheControl="3600",
+            ),
+            "x-upsert": "true",
+        })
+        resp.raise_for_status()
+        url = urljoin(self.endpoint, resp.headers["Location"])
+        self._save_url(url)
+        return url
+
+    def _offset(self, http: httpx.Client, url: str) -> int:
+        """The server's confirmed offset for an upload, or None if it no longer exists."""
+        resp = http.head(url, headers=self.headers)
+        if resp.status_code in (404, 410):
+            return None
+        resp.raise_for_status()
+        return int(resp.headers["Upload-Offset"])
+
+    def _report(self, offset: int):
+        if self.on_progress:
+            self.on_progress(offset / self.size if self.size else 1.0)
+
+    def run(self):
+        with httpx.Client(timeout=TIMEOUT) as http, open(self.local_path, "rb") as f:
+            url = self._saved_url()
+            offset = self._offset(http, url) if url else None
+            if offset is None:
+                url, offset = self._create(http), 0
+            elif offset:
+                print(f"[Upload] Resuming {self.object_name} at {offset / self.size:.0%}")
+            self._report(offset)
+
+            failures = 0
+            while offset < self.size:
+                f.seek(offset)
+                chunk = f.read(CHUNK_SIZE)
+                try:
+                    resp = http.patch(url, content=chunk, headers={
+                        **self.headers,
+                        "Upload-Offset": str(offset),
+                        "Content-Type": "application/offset+octet-stream",
+                    })
+                    resp.raise_for_status()
+                    offset = int(resp.headers["Upload-Offset"])
+                    failures = 0
+                    self._report(offset)
+                except (httpx.HTTPError, KeyError, ValueError) as e:
+                    failures += 1
+                    if failures >= MAX_ATTEMPTS:
+                        raise RuntimeError(f"Upload failed after {failures} attempts: {e}") from e
+                    delay = random.uniform(0, min(BACKOFF_CAP, 2 ** failures))
+                    print(f"[Upload] Chunk at {offset} failed ({e}); retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    # Resume from whatever the server actually stored
+                    try:
+                        confirmed = self._offset(http, url)
+                    except httpx.HTTPError:
+                        continue
+                    if confirmed is None:
+                        url, offset = self._create(http), 0
+                    else:
+                        offset = confirmed
+
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass